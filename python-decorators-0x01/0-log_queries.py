@@ -1,18 +1,73 @@
 #!/usr/bin/python3
 import sqlite3
 import functools
-from datetime import datetime
+import random
+import time
+
+from query_log import fingerprint, log_writer, query_stats
+
+def _query_arg(args, kwargs):
+    """Returns the SQL string a call was given, or None
+
+    Stacked under with_db_connection the first argument is the
+    connection, so only a str counts as the query.
+    """
+    query = kwargs.get('query')
+    if isinstance(query, str):
+        return query
+    return next((arg for arg in args if isinstance(arg, str)), None)
+
+def log_queries(func=None, *, sample_rate=1.0, writer=None, stats=None):
+    """Decorator to log SQL queries
+
+    Every call is timed and its latency added to the histogram of the
+    query's fingerprint (query_log.query_stats unless stats is given);
+    query_stats.dump() prints them. A sample_rate share of calls is
+    also handed to a background writer (query_log.log_writer unless
+    writer is given) as a JSON record, so the caller never waits on
+    stdout. Use as @log_queries or @log_queries(sample_rate=0.01).
+    """
+    if func is None:
+        return functools.partial(log_queries, sample_rate=sample_rate,
+                                 writer=writer, stats=stats)
+    writer = log_writer if writer is None else writer
+    stats = query_stats if stats is None else stats
 
-def log_queries(func):
-    """Decorator to log SQL queries"""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         # Log the query if it's passed as an argument
-        query = kwargs.get('query') or args[0] if args else None
-        if query:
-            timestamp = datetime.now()
-            print(f"[{timestamp}] {query}")
-        return func(*args, **kwargs)
+        query = _query_arg(args, kwargs)
+        if not query:
+            return func(*args, **kwargs)
+        timestamp = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            try:
+                record(query, timestamp, ms, error)
+            except Exception:
+                # The query already ran; losing its log entry is better
+                # than losing its result
+                pass
+
+    def record(query, timestamp, ms, error):
+        key = fingerprint(query)
+        stats.record(key, ms)
+        if sample_rate >= 1 or random.random() < sample_rate:
+            writer.submit({
+                "timestamp": timestamp,
+                "function": func.__qualname__,
+                "query": query,
+                "fingerprint": key,
+                "duration_ms": round(ms, 3),
+                "error": error,
+            })
     return wrapper
 
 @log_queries
@@ -24,5 +79,9 @@ def fetch_all_users(query):
     conn.close()
     return results
 
-#### fetch users while logging the query
-users = fetch_all_users(query="SELECT * FROM users")
\ No newline at end of file
+if __name__ == "__main__":
+    #### fetch users while logging the query
+    users = fetch_all_users(query="SELECT * FROM users")
+
+    #### per-fingerprint call counts and latencies
+    query_stats.dump()
\ No newline at end of file
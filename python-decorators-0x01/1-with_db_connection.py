@@ -2,10 +2,27 @@
 import sqlite3
 import functools
 
-def with_db_connection(func):
-    """Decorator to handle database connections"""
+from connection_pool import SQLitePool
+
+def with_db_connection(func=None, *, pool=None):
+    """Decorator to handle database connections
+
+    Opens and closes a users.db connection around every call, or with
+    pool=SQLitePool(...) borrows a reset, already open one and returns
+    it afterwards. Use as @with_db_connection or
+    @with_db_connection(pool=users_pool).
+    """
+    if func is None:
+        return functools.partial(with_db_connection, pool=pool)
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        if pool is not None:
+            conn = pool.acquire()
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                pool.release(conn)
         conn = sqlite3.connect('users.db')
         try:
             # Pass the connection as the first argument
@@ -15,12 +32,15 @@ def with_db_connection(func):
             conn.close()
     return wrapper
 
-@with_db_connection 
-def get_user_by_id(conn, user_id): 
-cursor = conn.cursor() 
-cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,)) 
-return cursor.fetchone() 
-#### Fetch user by ID with automatic connection handling 
+users_pool = SQLitePool('users.db')
+
+@with_db_connection(pool=users_pool)
+def get_user_by_id(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
 
-user = get_user_by_id(user_id=1)
-print(user)
\ No newline at end of file
+if __name__ == "__main__":
+    #### Fetch user by ID with automatic connection handling
+    user = get_user_by_id(user_id=1)
+    print(user)
\ No newline at end of file
@@ -2,6 +2,8 @@
 import sqlite3
 import functools
 
+from result_cache import query_cache, written_table
+
 def with_db_connection(func):
     """Decorator to handle database connections"""
     @functools.wraps(func)
@@ -14,17 +16,47 @@ def with_db_connection(func):
             conn.close()
     return wrapper
 
-def transactional(func):
-    """Decorator to handle database transactions"""
+def transactional(func=None, *, group=None):
+    """Decorator to handle database transactions
+
+    Statements are traced while func runs; after a successful commit
+    the cached query results of every table written are invalidated.
+
+    With group=GroupCommit(...) calls share commit windows instead of
+    committing one by one; the group supplies the connection, so the
+    function is not also decorated with with_db_connection:
+
+        @transactional(group=GroupCommit('users.db'))
+        def update_user_email(conn, user_id, new_email): ...
+    """
+    if func is None:
+        return functools.partial(transactional, group=group)
+    if group is not None:
+        @functools.wraps(func)
+        def grouped(*args, **kwargs):
+            return group.run(func, *args, **kwargs)
+        return grouped
+
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
+        written = set()
+
+        def trace(statement):
+            table = written_table(statement)
+            if table:
+                written.add(table)
+
+        conn.set_trace_callback(trace)
         try:
             result = func(conn, *args, **kwargs)
             conn.commit()
-            return result
         except Exception as e:
             conn.rollback()
             raise e
+        finally:
+            conn.set_trace_callback(None)
+        query_cache.invalidate_tables(written)
+        return result
     return wrapper
 
 @with_db_connection
@@ -33,5 +65,6 @@ def update_user_email(conn, user_id, new_email):
     cursor = conn.cursor()
     cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
 
-#### Update user's email with automatic transaction handling 
-update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
\ No newline at end of file
+if __name__ == "__main__":
+    #### Update user's email with automatic transaction handling
+    update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
\ No newline at end of file
@@ -1,9 +1,14 @@
 #!/usr/bin/python3
 import time
 import sqlite3
+import asyncio
+import inspect
 import functools
 import logging
 
+from retry_policy import (CircuitBreaker, CircuitOpenError, backoff_delay,
+                          retry_budget)
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -19,19 +24,86 @@ def with_db_connection(func):
             conn.close()
     return wrapper
 
-def retry_on_failure(retries=3, delay=2):
-    """Decorator to retry database operations on failure"""
+def retry_on_failure(retries=3, delay=2, backoff=2.0, max_delay=30.0,
+                     jitter=True, retry_on=(sqlite3.OperationalError,),
+                     budget=None, breaker=None):
+    """Decorator to retry database operations on failure
+
+    Only exceptions in retry_on are retried, after an exponentially
+    growing, jittered wait (see retry_policy.backoff_delay). Retries
+    draw on a process-wide budget (retry_policy.retry_budget unless
+    budget is given); when it is spent the error is raised at once.
+    A circuit breaker (a new CircuitBreaker per function unless breaker
+    is given) raises CircuitOpenError without calling func after
+    repeated failures. Coroutine functions are retried with
+    asyncio.sleep so the event loop keeps running.
+    """
+    budget = retry_budget if budget is None else budget
+
     def decorator(func):
+        circuit = CircuitBreaker() if breaker is None else breaker
+
+        def check_circuit():
+            if not circuit.allow():
+                raise CircuitOpenError(
+                    f"{func.__qualname__}: circuit open after repeated failures")
+
+        def retry_wait(error, attempt):
+            """Records a failed attempt; returns seconds to wait, or None to give up"""
+            if not isinstance(error, retry_on):
+                # The database answered; only retryable errors count
+                circuit.record_success()
+                return None
+            circuit.record_failure()
+            if (attempt == retries - 1 or circuit.state != circuit.CLOSED
+                    or not budget.withdraw()):
+                return None
+            wait = backoff_delay(attempt, delay, backoff, max_delay, jitter)
+            logger.warning(f"Attempt {attempt + 1} failed. Retrying in {wait:.2f} seconds...")
+            return wait
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                budget.deposit()
+                for attempt in range(retries):
+                    check_circuit()
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as e:
+                        wait = retry_wait(e, attempt)
+                        if wait is None:
+                            raise e
+                        await asyncio.sleep(wait)
+                    except BaseException:
+                        # Cancelled: give up a half-open probe slot
+                        circuit.release()
+                        raise
+                    else:
+                        circuit.record_success()
+                        return result
+                return None
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            budget.deposit()
             for attempt in range(retries):
+                check_circuit()
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except Exception as e:
-                    if attempt == retries - 1:  # Last attempt
+                    wait = retry_wait(e, attempt)
+                    if wait is None:
                         raise e
-                    logger.warning(f"Attempt {attempt + 1} failed. Retrying in {delay} seconds...")
-                    time.sleep(delay)
+                    time.sleep(wait)
+                except BaseException:
+                    # Interrupted: give up a half-open probe slot
+                    circuit.release()
+                    raise
+                else:
+                    circuit.record_success()
+                    return result
             return None
         return wrapper
     return decorator
@@ -43,7 +115,8 @@ def fetch_users_with_retry(conn):
     cursor.execute("SELECT * FROM users")
     return cursor.fetchall()
 
-#### attempt to fetch users with automatic retry on failure
+if __name__ == "__main__":
+    #### attempt to fetch users with automatic retry on failure
 
-users = fetch_users_with_retry()
-print(users)
\ No newline at end of file
+    users = fetch_users_with_retry()
+    print(users)
\ No newline at end of file
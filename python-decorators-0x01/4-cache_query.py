@@ -3,7 +3,7 @@ import time
 import sqlite3
 import functools
 
-query_cache = {}
+from result_cache import query_cache, read_tables
 
 def with_db_connection(func):
     """Decorator to handle database connections"""
@@ -17,19 +17,47 @@ def with_db_connection(func):
             conn.close()
     return wrapper
 
-def cache_query(func):
-    """Decorator to cache query results"""
+def cache_query(func=None, *, cache=None, ttl=None):
+    """Decorator to cache query results
+
+    Results are keyed by the query and its bound parameters and kept in
+    a bounded LRU cache (result_cache.query_cache unless cache is
+    given) for ttl seconds, or the cache's default TTL. Writes
+    committed through transactional drop the entries of the tables
+    they touch. Use as @cache_query or @cache_query(ttl=60).
+    """
+    if func is None:
+        return functools.partial(cache_query, cache=cache, ttl=ttl)
+    store = query_cache if cache is None else cache
+
     @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Use the query as the cache key
-        query = kwargs.get('query') or args[1] if len(args) > 1 else None
-        if query in query_cache:
+    def wrapper(conn, *args, **kwargs):
+        if 'query' in kwargs:
+            query, params = kwargs['query'], args
+        elif args:
+            query, params = args[0], args[1:]
+        else:
+            return func(conn, *args, **kwargs)
+        others = tuple(sorted(
+            (name, value) for name, value in kwargs.items() if name != 'query'
+        ))
+        key = (func.__qualname__, query, params, others)
+        try:
+            hit, result = store.get(key)
+        except TypeError:  # unhashable parameters
+            return func(conn, *args, **kwargs)
+        if hit:
             print("Returning cached result")
-            return query_cache[query]
-        
-        result = func(*args, **kwargs)
-        query_cache[query] = result
+            return result
+
+        tables = read_tables(query)
+        # Taken before the query runs so a write committed meanwhile
+        # keeps this (possibly pre-write) result out of the cache
+        generation = store.generation(tables)
+        result = func(conn, *args, **kwargs)
+        store.put(key, result, tables=tables, ttl=ttl, generation=generation)
         return result
+    wrapper.cache = store
     return wrapper
 
 @with_db_connection
@@ -39,8 +67,12 @@ def fetch_users_with_cache(conn, query):
     cursor.execute(query)
     return cursor.fetchall()
 
-#### First call will cache the result
-users = fetch_users_with_cache(query="SELECT * FROM users")
+if __name__ == "__main__":
+    #### First call will cache the result
+    users = fetch_users_with_cache(query="SELECT * FROM users")
+
+    #### Second call will use the cached result
+    users_again = fetch_users_with_cache(query="SELECT * FROM users")
 
-#### Second call will use the cached result
-users_again = fetch_users_with_cache(query="SELECT * FROM users")
\ No newline at end of file
+    #### Hit/miss/eviction counters
+    print(query_cache.stats())
\ No newline at end of file
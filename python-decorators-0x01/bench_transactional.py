@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""Measures bursty single-row updates/sec with and without group commit
+
+Runs in a temporary directory against a synthetic users.db.
+Usage: ./bench_transactional.py [updates] [threads]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from group_commit import GroupCommit
+
+transactional_module = __import__('2-transactional')
+transactional = transactional_module.transactional
+with_db_connection = transactional_module.with_db_connection
+
+USERS = 1000
+
+
+def seed_users(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, "
+                 "email TEXT)")
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?)",
+        ((i, f"user{i}", f"user{i}@example.com") for i in range(1, USERS + 1))
+    )
+    conn.commit()
+    conn.close()
+
+
+def set_email(conn, user_id, new_email):
+    conn.execute("UPDATE users SET email = ? WHERE id = ?",
+                 (new_email, user_id))
+
+
+def shared_connection():
+    """set_email committing per call on one connection, like a pool"""
+    conn = sqlite3.connect('users.db', check_same_thread=False)
+    lock = threading.Lock()
+    update = transactional(set_email)
+
+    def call(**kwargs):
+        with lock:
+            update(conn, **kwargs)
+    return call
+
+
+def updates_per_sec(update, updates, threads):
+    def run(count):
+        for i in range(count):
+            update(user_id=i % USERS + 1, new_email=f"new{i}@example.com")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        for _ in executor.map(run, [updates // threads] * threads):
+            pass
+    return updates // threads * threads / (time.perf_counter() - start)
+
+
+def main(updates, threads):
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        seed_users('users.db')
+
+        print(f"{'mode':<18} {'updates/sec':>12} {'commits':>8} "
+              f"{'speedup':>8}")
+        baseline = updates_per_sec(
+            with_db_connection(transactional(set_email)), updates, threads)
+        print(f"{'per call':<18} {baseline:>12.0f} {updates:>8} {1:>8.2f}")
+
+        rate = updates_per_sec(shared_connection(), updates, threads)
+        print(f"{'shared connection':<18} {rate:>12.0f} {updates:>8} "
+              f"{rate / baseline:>8.2f}")
+
+        group = GroupCommit('users.db')
+        rate = updates_per_sec(
+            transactional(set_email, group=group), updates, threads)
+        commits = group.stats()['commits']
+        group.close()
+        print(f"{'group commit':<18} {rate:>12.0f} {commits:>8} "
+              f"{rate / baseline:>8.2f}")
+        os.chdir('/')
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 16)
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""Measures get_user_by_id calls/sec with and without a connection pool
+
+Runs in a temporary directory against a synthetic users.db.
+Usage: ./bench_with_db_connection.py [calls] [threads]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from connection_pool import SQLitePool
+
+with_db_connection = __import__('1-with_db_connection').with_db_connection
+
+USERS = 1000
+
+
+def seed_users(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, "
+                 "email TEXT)")
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?)",
+        ((i, f"user{i}", f"user{i}@example.com") for i in range(1, USERS + 1))
+    )
+    conn.commit()
+    conn.close()
+
+
+def lookup(pool):
+    """Returns get_user_by_id decorated for the given pool (or none)"""
+    def get_user_by_id(conn, user_id):
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+        return cursor.fetchone()
+    return with_db_connection(get_user_by_id, pool=pool)
+
+
+def calls_per_sec(get_user, calls, threads):
+    def run(count):
+        for i in range(count):
+            get_user(user_id=i % USERS + 1)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        for _ in executor.map(run, [calls // threads] * threads):
+            pass
+    return calls // threads * threads / (time.perf_counter() - start)
+
+
+def main(calls, threads):
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        seed_users('users.db')
+        modes = (
+            ('unpooled', None),
+            ('shared pool', SQLitePool('users.db', max_size=threads)),
+            ('per-thread', SQLitePool('users.db', per_thread=True)),
+        )
+        print(f"{'mode':<12} {'calls/sec':>12} {'speedup':>8}")
+        baseline = None
+        for name, pool in modes:
+            rate = calls_per_sec(lookup(pool), calls, threads)
+            baseline = baseline or rate
+            print(f"{name:<12} {rate:>12.0f} {rate / baseline:>8.2f}")
+            if pool is not None:
+                pool.close()
+        os.chdir('/')
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1)
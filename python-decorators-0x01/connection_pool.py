@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+"""Reusable SQLite connections for with_db_connection"""
+import sqlite3
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be borrowed in time"""
+
+
+def _reset(conn):
+    """Returns a borrowed connection to a clean state"""
+    if conn.in_transaction:
+        conn.rollback()
+    conn.set_trace_callback(None)
+    conn.row_factory = None
+
+
+class SQLitePool:
+    """Pool of open connections to one SQLite database
+
+    Shared mode (the default) keeps up to max_size connections that any
+    thread may borrow. per_thread=True instead gives every thread its own
+    connection, which needs no locking. Either way a connection is reset
+    (open transaction rolled back, trace callback and row factory
+    cleared) when it is returned, and one left idle for more than
+    idle_timeout seconds is closed and reopened on its next borrow.
+    """
+
+    def __init__(self, database='users.db', max_size=5, idle_timeout=300.0,
+                 per_thread=False, timeout=None):
+        self.database = database
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.per_thread = per_thread
+        self.timeout = timeout
+        self._idle = []  # (conn, returned at), most recently used last
+        self._size = 0
+        self._local = threading.local()
+        self._cond = threading.Condition()
+        self._stats = {"borrows": 0, "created": 0, "recycled": 0}
+
+    def acquire(self):
+        """Borrows a connection, blocking while max_size are in use"""
+        if self.per_thread:
+            return self._acquire_local()
+        deadline = None if self.timeout is None else (
+            time.monotonic() + self.timeout)
+        stale = []
+        try:
+            with self._cond:
+                self._stats["borrows"] += 1
+                while True:
+                    # Borrows come from the back, so connections left
+                    # idle too long collect at the front
+                    while self._idle and self._expired(self._idle[0][1]):
+                        stale.append(self._idle.pop(0)[0])
+                        self._size -= 1
+                        self._stats["recycled"] += 1
+                    if self._idle:
+                        return self._idle.pop()[0]
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = None if deadline is None else (
+                        deadline - time.monotonic())
+                    if remaining is not None and remaining <= 0:
+                        raise PoolTimeout(
+                            f"no connection to {self.database} within "
+                            f"{self.timeout}s")
+                    self._cond.wait(remaining)
+        finally:
+            for conn in stale:
+                conn.close()
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn):
+        """Returns a borrowed connection to the pool"""
+        try:
+            _reset(conn)
+        except sqlite3.Error:
+            conn.close()
+            conn = None
+        if self.per_thread:
+            if getattr(self._local, "conn", None) is not None:
+                # A nested borrow on this thread opened a second one
+                if conn is not None:
+                    conn.close()
+                return
+            self._local.conn = conn
+            self._local.returned = time.monotonic()
+            return
+        with self._cond:
+            if conn is None:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        """Closes the idle shared connections and the calling thread's own"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _ in idle:
+            conn.close()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            conn.close()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+        return stats
+
+    def _acquire_local(self):
+        conn = getattr(self._local, "conn", None)
+        with self._cond:
+            self._stats["borrows"] += 1
+        if conn is not None:
+            self._local.conn = None
+            if not self._expired(self._local.returned):
+                return conn
+            with self._cond:
+                self._stats["recycled"] += 1
+            conn.close()
+        return self._connect()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        with self._cond:
+            self._stats["created"] += 1
+        return conn
+
+    def _expired(self, returned):
+        return time.monotonic() - returned > self.idle_timeout
@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""Shared commit windows for bursts of small transactions"""
+import sqlite3
+import threading
+import time
+
+from result_cache import query_cache, written_table
+
+
+class _Window:
+    """One group of transactions that will be committed together"""
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.size = 0
+        self.written = set()
+        self.error = None
+        self.done = threading.Event()
+
+
+class GroupCommit:
+    """Runs transactions on one connection and commits them in groups
+
+    The first transaction opens a window and transactions arriving while
+    it is open join it. A single COMMIT covers all of them once no other
+    caller is queued to join, max_batch have joined or max_delay seconds
+    have passed, so a lone call commits at once while a burst of
+    concurrent ones shares a commit. Each one runs in its own savepoint,
+    so a failing one is rolled back alone and its caller gets its
+    exception while the others carry on. run() returns only after the
+    window's COMMIT succeeded; if the COMMIT fails, every transaction in
+    the window raises that error.
+    """
+
+    def __init__(self, database='users.db', max_batch=64, max_delay=0.005):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._conn = sqlite3.connect(database, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.set_trace_callback(self._trace)
+        self._lock = threading.Lock()
+        self._window = None
+        self._queued = 0  # callers waiting for _lock to join a window
+        self._queued_lock = threading.Lock()
+        self._stats = {"transactions": 0, "commits": 0, "rollbacks": 0}
+
+    def run(self, func, *args, **kwargs):
+        """Calls func(conn, *args, **kwargs) as one transaction of a group"""
+        with self._queued_lock:
+            self._queued += 1
+        with self._lock:
+            with self._queued_lock:
+                self._queued -= 1
+            window = self._window
+            if window is None:
+                self._conn.execute("BEGIN")
+                window = self._window = _Window(
+                    time.monotonic() + self.max_delay)
+            # The first member needs no savepoint: it can roll back the
+            # whole transaction
+            first = window.size == 0
+            if not first:
+                self._conn.execute("SAVEPOINT group_member")
+            try:
+                result = func(self._conn, *args, **kwargs)
+            except Exception:
+                self._stats["rollbacks"] += 1
+                if first:
+                    self._window = None
+                    self._conn.execute("ROLLBACK")
+                    window.done.set()
+                else:
+                    self._conn.execute("ROLLBACK TO group_member")
+                    self._conn.execute("RELEASE group_member")
+                    if not self._queued:
+                        self._commit(window)
+                raise
+            if not first:
+                self._conn.execute("RELEASE group_member")
+            window.size += 1
+            self._stats["transactions"] += 1
+            if window.size >= self.max_batch or not self._queued:
+                self._commit(window)
+
+        while not window.done.wait(max(0, window.deadline - time.monotonic())):
+            with self._lock:
+                if self._window is window:
+                    self._commit(window)
+        if window.error is not None:
+            raise window.error
+        return result
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        with self._lock:
+            if self._window is not None:
+                self._commit(self._window)
+            self._conn.close()
+
+    def _commit(self, window):
+        """Ends window's transaction; called with the lock held"""
+        self._window = None
+        try:
+            self._conn.execute("COMMIT")
+            self._stats["commits"] += 1
+        except Exception as e:
+            window.error = e
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+        if window.error is None:
+            query_cache.invalidate_tables(window.written)
+        window.done.set()
+
+    def _trace(self, statement):
+        table = written_table(statement)
+        if table and self._window is not None:
+            self._window.written.add(table)
@@ -0,0 +1,184 @@
+#!/usr/bin/python3
+"""Background query log writer and per-fingerprint latency statistics"""
+import atexit
+import bisect
+import functools
+import json
+import queue
+import re
+import sys
+import threading
+from datetime import datetime
+
+_STRING = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+# Upper bounds (ms) of the latency histogram buckets; the last is open
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000,
+              2500, 5000, 10000)
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(query):
+    """Normalises a query so calls differing only in literals match
+
+    String and numeric literals become ?, lists of them collapse to
+    (...) and runs of whitespace to one space.
+    """
+    query = _STRING.sub("?", query)
+    query = _NUMBER.sub("?", query)
+    query = _IN_LIST.sub("(...)", query)
+    return _SPACE.sub(" ", query).strip()
+
+
+class LatencyHistogram:
+    """Count, total, max and bucketed distribution of query latencies"""
+
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile"""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": self.max_ms,
+            "buckets": dict(zip([*map(str, BUCKETS_MS), "inf"], self.buckets)),
+        }
+
+
+class QueryStats:
+    """Thread-safe latency histograms keyed by query fingerprint"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, fingerprint, ms):
+        with self._lock:
+            histogram = self._histograms.get(fingerprint)
+            if histogram is None:
+                histogram = self._histograms[fingerprint] = LatencyHistogram()
+            histogram.add(ms)
+
+    def snapshot(self):
+        """Returns {fingerprint: stats}, most total time first"""
+        with self._lock:
+            items = [(fp, h.as_dict()) for fp, h in self._histograms.items()]
+        items.sort(key=lambda item: item[1]["total_ms"], reverse=True)
+        return dict(items)
+
+    def dump(self, file=None):
+        """Prints a table of the fingerprints, most total time first"""
+        file = file or sys.stderr
+        print(f"{'count':>8} {'total ms':>10} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'max ms':>8}  query", file=file)
+        for fp, stats in self.snapshot().items():
+            print(f"{stats['count']:>8} {stats['total_ms']:>10.1f} "
+                  f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+                  f"{stats['max_ms']:>8.2f}  {fp}", file=file)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+class LogWriter:
+    """Writes query log records as JSON lines from a background thread
+
+    submit() only enqueues, so callers never wait on the stream. The
+    writer thread drains whatever is queued, up to batch_size records,
+    and writes it with one call and one flush. When max_queued records
+    are waiting, new ones are dropped and counted in dropped rather
+    than blocking the caller.
+    """
+
+    def __init__(self, stream=None, batch_size=256, max_queued=10000):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue = queue.Queue(max_queued)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, record):
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """Writes out everything queued and stops the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="query-log", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            batch = []
+            while record is not None:
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            if record is None:
+                return
+
+    def _write(self, batch):
+        lines = []
+        for record in batch:
+            record["timestamp"] = datetime.fromtimestamp(
+                record["timestamp"]).isoformat()
+            lines.append(json.dumps(record, default=str))
+        stream = self.stream or sys.stdout
+        stream.write("\n".join(lines) + "\n")
+        stream.flush()
+
+
+# Shared by every log_queries-decorated function
+query_stats = QueryStats()
+log_writer = LogWriter()
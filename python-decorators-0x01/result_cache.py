@@ -0,0 +1,161 @@
+#!/usr/bin/python3
+"""Bounded query result cache shared by cache_query and transactional"""
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+_READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+[`"\[]?(\w+)', re.IGNORECASE)
+_WRITTEN_TABLE = re.compile(
+    r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO'
+    r'|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[`"\[]?(\w+)',
+    re.IGNORECASE)
+
+
+def read_tables(query):
+    """Returns the lowercased names of the tables a query reads"""
+    return frozenset(name.lower() for name in _READ_TABLES.findall(query))
+
+
+def written_table(statement):
+    """Returns the lowercased table a write statement changes, or None"""
+    match = _WRITTEN_TABLE.match(statement)
+    return match.group(1).lower() if match else None
+
+
+def _sizeof(value):
+    """Approximates the memory held by a result (rows of scalars)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(_sizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    return size
+
+
+class QueryCache:
+    """Thread-safe LRU cache of query results with a TTL per entry
+
+    Holds at most max_entries results and about max_bytes of them;
+    the least recently used entries are evicted first. Entries older
+    than ttl seconds are treated as misses. Each entry remembers the
+    tables its query reads so invalidate_tables() can drop it when
+    one of them is written.
+
+    A read that overlaps a write could otherwise store its pre-write
+    result after the invalidation. Callers take generation(tables)
+    before running the query and pass it to put(), which then stores
+    nothing if any of the tables has been invalidated since.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024,
+                 ttl=300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (result, size, expires, tables)
+        self._by_table = {}
+        self._generations = {}  # table -> number of invalidations
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "stale": 0,
+        }
+
+    def get(self, key):
+        """Returns (True, result) for a fresh entry, else (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, entry[0]
+
+    def generation(self, tables):
+        """Returns a token that changes when one of tables is invalidated"""
+        with self._lock:
+            return self._generation(tables)
+
+    def put(self, key, result, tables=(), ttl=None, generation=None):
+        """Caches result under key, evicting old entries to make room
+
+        With generation (from generation(tables) before the query ran)
+        the result is dropped if the tables were invalidated since.
+        """
+        size = _sizeof(result)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        tables = frozenset(tables)
+        with self._lock:
+            if (generation is not None
+                    and generation != self._generation(tables)):
+                self._stats["stale"] += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, size, expires, tables)
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def invalidate_tables(self, tables):
+        """Drops every entry whose query reads one of tables"""
+        with self._lock:
+            for table in tables:
+                table = table.lower()
+                self._generations[table] = self._generations.get(table, 0) + 1
+                for key in list(self._by_table.get(table, ())):
+                    self._remove(key)
+                    self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Returns hit/miss/eviction counters and the current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        return stats
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _generation(self, tables):
+        return tuple(self._generations.get(table, 0)
+                     for table in sorted(tables))
+
+    def _remove(self, key):
+        _, size, _, tables = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table[table]
+            keys.discard(key)
+            if not keys:
+                del self._by_table[table]
+
+
+# Shared by cache_query (4-cache_query.py) and transactional
+# (2-transactional.py) so committed writes invalidate cached reads
+query_cache = QueryCache()
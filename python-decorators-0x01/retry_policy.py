@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""Backoff, retry budget and circuit breaker used by retry_on_failure"""
+import random
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling through while a circuit is open"""
+
+
+def backoff_delay(attempt, delay, backoff=2.0, max_delay=30.0, jitter=True):
+    """Seconds to wait before retry number attempt (0-based)
+
+    The cap grows as delay * backoff ** attempt up to max_delay. With
+    jitter the wait is drawn uniformly below the cap ("full jitter"), so
+    clients failing together do not retry together.
+    """
+    cap = min(max_delay, delay * backoff ** attempt)
+    return random.uniform(0, cap) if jitter else cap
+
+
+class RetryBudget:
+    """Process-wide token bucket limiting retries to a share of calls
+
+    Every first attempt deposits ratio tokens (up to max_tokens) and
+    every retry spends one, so across all threads retries stay at about
+    ratio times the call rate. When the database is down and every call
+    fails, retries stop once the bucket is empty instead of multiplying
+    the load.
+    """
+
+    def __init__(self, ratio=0.2, max_tokens=10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+        self.exhausted = 0
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self):
+        """Spends a token for one retry; False when none is left"""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+
+class CircuitBreaker:
+    """Fails fast after repeated failures, then probes for recovery
+
+    After failure_threshold consecutive failures the circuit opens and
+    allow() refuses calls. Once reset_timeout seconds have passed it is
+    half-open: a single probe call is let through, and its outcome
+    closes the circuit again or reopens it for another reset_timeout.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def allow(self):
+        """True if a call may go through now"""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release(self):
+        """Frees the half-open probe slot of a call that had no outcome
+
+        For calls interrupted by cancellation or KeyboardInterrupt, so
+        the next call may probe instead of the circuit staying shut.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def _state(self):
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+
+# Shared by every retry_on_failure-decorated function
+retry_budget = RetryBudget()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests for cache_query invalidation by transactional writes"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from result_cache import query_cache
+
+cache_query = __import__('4-cache_query').cache_query
+transactional = __import__('2-transactional').transactional
+
+
+class TestCacheInvalidation(unittest.TestCase):
+    """Test cases for reads overlapping transactional writes"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT)")
+        conn.execute("INSERT INTO users VALUES (1, 'old')")
+        conn.commit()
+        conn.close()
+        query_cache.clear()
+
+    def tearDown(self):
+        query_cache.clear()
+        os.remove(self.path)
+
+    def connect(self):
+        conn = sqlite3.connect(self.path)
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_write_after_read(self):
+        """A committed write drops the cached result"""
+        @cache_query
+        def fetch(conn, query):
+            return conn.execute(query).fetchall()
+
+        @transactional
+        def update_email(conn, new_email):
+            conn.execute("UPDATE users SET email = ? WHERE id = 1",
+                         (new_email,))
+
+        conn = self.connect()
+        self.assertEqual(fetch(conn, "SELECT email FROM users"), [('old',)])
+        update_email(self.connect(), 'new')
+        self.assertEqual(fetch(conn, "SELECT email FROM users"), [('new',)])
+
+    def test_write_during_read(self):
+        """A read overlapping a commit does not cache its stale result"""
+        writer = self.connect()
+
+        @transactional
+        def update_email(conn, new_email):
+            conn.execute("UPDATE users SET email = ? WHERE id = 1",
+                         (new_email,))
+
+        commits = ['new']
+
+        @cache_query
+        def fetch(conn, query):
+            rows = conn.execute(query).fetchall()
+            if commits:
+                update_email(writer, commits.pop())
+            return rows
+
+        conn = self.connect()
+        self.assertEqual(fetch(conn, "SELECT email FROM users"), [('old',)])
+        self.assertEqual(fetch(conn, "SELECT email FROM users"), [('new',)])
+        self.assertEqual(query_cache.stats()["stale"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
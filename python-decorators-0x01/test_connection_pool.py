@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Tests for idle connection expiry in SQLitePool"""
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from connection_pool import SQLitePool
+
+
+class TestIdleExpiry(unittest.TestCase):
+    """Test cases for closing connections left idle too long"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.pool = SQLitePool(self.path, max_size=3, idle_timeout=0.05)
+        self.addCleanup(os.remove, self.path)
+        self.addCleanup(self.pool.close)
+
+    def test_borrow_sweeps_old_idle(self):
+        """A borrow closes every expired idle connection, not just its own"""
+        old = [self.pool.acquire() for _ in range(2)]
+        for conn in old:
+            self.pool.release(conn)
+        time.sleep(0.1)
+        fresh = self.pool.acquire()
+        self.pool.release(fresh)
+        fresh = self.pool.acquire()
+
+        self.assertEqual(self.pool.stats()["recycled"], 2)
+        self.assertEqual(self.pool.stats()["idle"], 0)
+        for conn in old:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+        self.pool.release(fresh)
+
+
+if __name__ == '__main__':
+    unittest.main()
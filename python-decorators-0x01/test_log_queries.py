@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Tests for the query argument and stats failures of log_queries"""
+
+import sqlite3
+import unittest
+
+from query_log import QueryStats
+
+log_queries = __import__('0-log_queries').log_queries
+
+
+class _Writer:
+    """Collects submitted records instead of writing them"""
+
+    def __init__(self):
+        self.records = []
+
+    def submit(self, record):
+        self.records.append(record)
+
+
+class _BrokenStats:
+    def record(self, fingerprint, ms):
+        raise RuntimeError("stats backend down")
+
+
+class TestLogQueries(unittest.TestCase):
+    """Test cases for log_queries around other decorators"""
+
+    def setUp(self):
+        self.writer = _Writer()
+        self.conn = sqlite3.connect(':memory:')
+        self.addCleanup(self.conn.close)
+
+    def test_connection_before_query(self):
+        """The str argument is logged, not the connection before it"""
+        stats = QueryStats()
+
+        @log_queries(writer=self.writer, stats=stats)
+        def fetch(conn, query):
+            return conn.execute(query).fetchall()
+
+        self.assertEqual(fetch(self.conn, "SELECT 1"), [(1,)])
+        self.assertEqual(list(stats.snapshot()), ["SELECT ?"])
+        self.assertEqual(self.writer.records[0]["query"], "SELECT 1")
+
+    def test_stats_failure_keeps_result(self):
+        """A failing stats backend does not lose the query's result"""
+        @log_queries(writer=self.writer, stats=_BrokenStats())
+        def fetch(conn, query):
+            return conn.execute(query).fetchall()
+
+        self.assertEqual(fetch(self.conn, query="SELECT 1"), [(1,)])
+
+    def test_stats_failure_keeps_error(self):
+        """A failing stats backend does not mask the query's own error"""
+        @log_queries(writer=self.writer, stats=_BrokenStats())
+        def fetch(conn, query):
+            return conn.execute(query).fetchall()
+
+        with self.assertRaises(sqlite3.OperationalError):
+            fetch(self.conn, "SELECT * FROM missing")
+
+
+if __name__ == '__main__':
+    unittest.main()
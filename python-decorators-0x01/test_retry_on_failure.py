@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Tests for the circuit breaker of retry_on_failure"""
+
+import asyncio
+import sqlite3
+import time
+import unittest
+
+from retry_policy import CircuitBreaker, CircuitOpenError, RetryBudget
+
+retry_on_failure = __import__('3-retry_on_failure').retry_on_failure
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for the half-open probe of CircuitBreaker"""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        self.budget = RetryBudget()
+
+    def open_circuit(self, func):
+        """Fails func once to open the circuit, then waits for half-open"""
+        with self.assertRaises(sqlite3.OperationalError):
+            func()
+        time.sleep(0.02)
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+    def test_cancelled_probe_frees_slot(self):
+        """A probe cancelled by wait_for lets the next call probe"""
+        calls = []
+
+        @retry_on_failure(retries=1, breaker=self.breaker, budget=self.budget)
+        async def fetch(hang=False, fail=False):
+            calls.append(hang)
+            if fail:
+                raise sqlite3.OperationalError("database is locked")
+            if hang:
+                await asyncio.sleep(10)
+            return "ok"
+
+        self.open_circuit(lambda: asyncio.run(fetch(fail=True)))
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(fetch(hang=True), 0.01))
+        self.assertEqual(asyncio.run(fetch()), "ok")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(calls, [False, True, False])
+
+    def test_interrupted_probe_frees_slot(self):
+        """A probe interrupted by KeyboardInterrupt lets the next call probe"""
+        outcomes = [sqlite3.OperationalError("database is locked"),
+                    KeyboardInterrupt(), None]
+
+        @retry_on_failure(retries=1, breaker=self.breaker, budget=self.budget)
+        def fetch():
+            outcome = outcomes.pop(0)
+            if outcome is not None:
+                raise outcome
+            return "ok"
+
+        self.open_circuit(fetch)
+        with self.assertRaises(KeyboardInterrupt):
+            fetch()
+        self.assertEqual(fetch(), "ok")
+
+    def test_open_circuit_fails_fast(self):
+        """Calls while the circuit is open never reach the function"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        calls = []
+
+        @retry_on_failure(retries=1, breaker=breaker, budget=self.budget)
+        def fetch():
+            calls.append(1)
+            raise sqlite3.OperationalError("database is locked")
+
+        with self.assertRaises(sqlite3.OperationalError):
+            fetch()
+        with self.assertRaises(CircuitOpenError):
+            fetch()
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
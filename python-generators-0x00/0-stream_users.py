@@ -1,15 +1,44 @@
 #!/usr/bin/python3
-from seed import connect_to_prodev
-
-def stream_users():
-    """Generator function that streams rows from user_data table"""
-    connection = connect_to_prodev()
-    if connection:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM user_data")
-        
-        for row in cursor:
-            yield row
-            
-        cursor.close()
-        connection.close()
\ No newline at end of file
+from query import ALL_USERS
+from records import as_records
+from seed import pooled_connection, close_cursor
+
+def stream_users(chunk_size=None, query=ALL_USERS, compact=False):
+    """Generator function that streams rows from user_data table
+
+    Rows come from an unbuffered cursor (mysql.connector's default),
+    one fetch per row, so client memory stays flat however large the
+    table is. With chunk_size set they are pulled with
+    fetchmany(chunk_size) instead, a chunk per round of the protocol.
+    A query.Query restricts the columns and rows fetched on the
+    database side. compact yields tuple-backed records (see
+    records.py) instead of dicts.
+    """
+    sql, params = query.to_sql()
+    with pooled_connection() as connection:
+        if not connection:
+            return
+        if chunk_size is None:
+            cursor = connection.cursor(dictionary=not compact)
+            cursor.execute(sql, params)
+
+            rows = as_records(cursor, query.columns) if compact else cursor
+            for row in rows:
+                yield row
+
+            cursor.close()
+            return
+
+        cursor = connection.cursor(dictionary=not compact, buffered=False)
+        cursor.execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if compact:
+                    rows = as_records(rows, query.columns)
+                for row in rows:
+                    yield row
+        finally:
+            close_cursor(connection, cursor)
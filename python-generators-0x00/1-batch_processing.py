@@ -1,29 +1,89 @@
 #!/usr/bin/python3
-from seed import connect_to_prodev
-
-def stream_users_in_batches(batch_size):
-    """Fetches users in batches"""
-    connection = connect_to_prodev()
-    if connection:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM user_data")
-        
-        batch = []
-        for row in cursor:
-            batch.append(row)
-            if len(batch) == batch_size:
+import numpy as np
+
+from query import ALL_USERS, Query
+from records import as_records
+from seed import pooled_connection, close_cursor
+
+OVER_25 = Query(where=[('age', '>', 25)])
+TEXT_COLUMNS = ('user_id', 'name', 'email')
+
+def stream_users_in_batches(batch_size, query=ALL_USERS, compact=False):
+    """Fetches users in batches, restricted to query's columns and rows
+
+    compact fills the batches with tuple-backed records instead of dicts.
+    """
+    sql, params = query.to_sql()
+    with pooled_connection() as connection:
+        if not connection:
+            return
+        cursor = connection.cursor(dictionary=not compact)
+        cursor.execute(sql, params)
+        try:
+            rows = as_records(cursor, query.columns) if compact else cursor
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+
+            if batch:
                 yield batch
-                batch = []
-        
-        if batch:
-            yield batch
-            
-        cursor.close()
-        connection.close()
+        finally:
+            close_cursor(connection, cursor)
 
 def batch_processing(batch_size):
-    """Processes batches and filters users over 25"""
-    for batch in stream_users_in_batches(batch_size):
+    """Processes batches of users over 25, filtered in the database"""
+    for batch in stream_users_in_batches(batch_size, OVER_25):
         for user in batch:
-            if user['age'] > 25:
-                print(user)
\ No newline at end of file
+            print(user)
+
+def _column_array(column, values):
+    """Packs one column of a batch into a compact NumPy array"""
+    if column == 'age':
+        return np.array(values, dtype=np.uint8)
+    if column in TEXT_COLUMNS:
+        # For ASCII text UTF-8 bytes take a quarter of NumPy's UTF-32 str
+        return np.array([value.encode() for value in values], dtype='S')
+    return np.array(values)
+
+def stream_user_columns(batch_size, query=ALL_USERS):
+    """Fetches users in column-oriented batches
+
+    Each batch maps a column name to a NumPy array: uint8 for age
+    (TINYINT UNSIGNED) and fixed-width UTF-8 bytes for the text
+    columns, so filters and aggregates can run over a whole batch at
+    once. Compare text columns against bytes, e.g. b"a@example.com".
+    """
+    sql, params = query.to_sql()
+    with pooled_connection() as connection:
+        if not connection:
+            return
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield {
+                    column: _column_array(column, values)
+                    for column, values in zip(query.columns, zip(*rows))
+                }
+        finally:
+            close_cursor(connection, cursor)
+
+def select_rows(batch, mask):
+    """Returns the rows of a column batch where mask is True"""
+    return {column: values[mask] for column, values in batch.items()}
+
+def batch_processing_columns(batch_size):
+    """Processes column batches and filters users over 25 vectorized"""
+    for batch in stream_user_columns(batch_size):
+        selected = select_rows(batch, batch['age'] > 25)
+        for values in zip(*selected.values()):
+            values = (v.item() for v in values)
+            print(dict(zip(selected.keys(),
+                           (v.decode() if isinstance(v, bytes) else v
+                            for v in values))))
@@ -1,21 +1,155 @@
 #!/usr/bin/python3
-from seed import connect_to_prodev
+import base64
+import json
+import queue
+import threading
+
+from seed import pooled_connection
+
+# Only indexed columns (the primary key, idx_email and idx_age; see
+# seed.create_table): seeking on any other one sorts the whole table
+# for every page
+KEYSET_COLUMNS = ("user_id", "email", "age")
 
 def paginate_users(page_size, offset):
     """Fetches paginated data from the database"""
-    connection = connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
-    rows = cursor.fetchall()
-    connection.close()
+    with pooled_connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(f"SELECT user_id, name, email, age FROM user_data "
+                       f"LIMIT {page_size} OFFSET {offset}")
+        rows = cursor.fetchall()
+        cursor.close()
     return rows
 
-def lazy_paginate(page_size):
-    """Generator function for lazy loading paginated data"""
+def lazy_paginate(page_size, prefetch=0):
+    """Generator function for lazy loading paginated data
+
+    With prefetch set, up to that many pages are fetched ahead on a
+    background thread while the current one is being consumed.
+    """
+    if prefetch:
+        yield from read_ahead(lazy_paginate(page_size), prefetch)
+        return
     offset = 0
     while True:
         page = paginate_users(page_size, offset)
         if not page:
             break
         yield page
-        offset += page_size
\ No newline at end of file
+        offset += page_size
+
+class _Failure:
+    """Carries an exception from the read-ahead thread to the consumer"""
+
+    def __init__(self, error):
+        self.error = error
+
+def read_ahead(items, depth):
+    """Iterates items on a background thread, at most depth ahead
+
+    Items come out in order and errors are re-raised in the consumer.
+    Closing the generator early stops the thread and closes items.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(done)
+        except BaseException as err:
+            put(_Failure(err))
+        finally:
+            if hasattr(items, 'close'):
+                items.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+def encode_token(key, row):
+    """Builds an opaque resume token pointing just past row"""
+    position = [key, str(row[key]), row["user_id"]]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def decode_token(token):
+    """Returns the (key, value, user_id) position stored in a token"""
+    try:
+        key, value, user_id = json.loads(base64.urlsafe_b64decode(token))
+    except (ValueError, TypeError) as err:
+        raise ValueError(f"Invalid resume token: {token!r}") from err
+    return key, value, user_id
+
+def paginate_users_after(page_size, token=None, key="user_id"):
+    """Fetches the page that follows token using keyset pagination
+
+    Rows are ordered by key (with user_id breaking ties on non-unique
+    columns) and the page starts with a seek on that order instead of
+    an OFFSET, so it costs the same at any depth. key must be one of
+    the indexed KEYSET_COLUMNS. Returns the rows and the token for the
+    next page, which is None on the last page.
+    """
+    if key not in KEYSET_COLUMNS:
+        raise ValueError(f"Cannot paginate on unindexed column {key!r}")
+    order = "user_id" if key == "user_id" else f"{key}, user_id"
+    where, params = "", ()
+    if token is not None:
+        token_key, value, user_id = decode_token(token)
+        if token_key != key:
+            raise ValueError(f"Token was issued for column {token_key!r}")
+        if key == "user_id":
+            where, params = "WHERE user_id > %s", (user_id,)
+        else:
+            where = f"WHERE ({key}, user_id) > (%s, %s)"
+            params = (value, user_id)
+
+    with pooled_connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(
+            f"SELECT user_id, name, email, age FROM user_data {where} "
+            f"ORDER BY {order} LIMIT %s",
+            params + (page_size,))
+        rows = cursor.fetchall()
+        cursor.close()
+
+    next_token = encode_token(key, rows[-1]) if len(rows) == page_size else None
+    return rows, next_token
+
+def lazy_paginate_keyset(page_size, key="user_id", token=None, prefetch=0):
+    """Generator yielding (page, resume_token) pairs in key order
+
+    Passing a previously yielded token resumes the walk right after
+    the page it was yielded with. prefetch works as in lazy_paginate.
+    """
+    if prefetch:
+        yield from read_ahead(lazy_paginate_keyset(page_size, key, token),
+                              prefetch)
+        return
+    while True:
+        page, token = paginate_users_after(page_size, token, key)
+        if page:
+            yield page, token
+        if token is None:
+            break
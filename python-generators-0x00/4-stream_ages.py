@@ -1,33 +1,70 @@
 #!/usr/bin/python3
-from seed import connect_to_prodev
+import mysql.connector
+
+from query import Query
+from seed import pooled_connection, close_cursor
+from sketches import StreamingStats
+from stats import AgeStats, load_stats
+
+stream_user_columns = __import__('1-batch_processing').stream_user_columns
 
 def stream_user_ages():
     """Generator that yields user ages one by one"""
-    connection = connect_to_prodev()
-    if connection:
+    with pooled_connection() as connection:
+        if not connection:
+            return
         cursor = connection.cursor(dictionary=True)
         cursor.execute("SELECT age FROM user_data")
-        
-        for row in cursor:
-            yield row['age']
-            
-        cursor.close()
-        connection.close()
-
-def calculate_average_age():
-    """Calculates average age using the generator"""
-    total_age = 0
-    count = 0
-    
-    for age in stream_user_ages():
-        total_age += age
-        count += 1
-    
-    if count > 0:
-        average_age = total_age / count
-        print(f"Average age of users: {average_age:.2f}")
+        try:
+            for row in cursor:
+                yield row['age']
+        finally:
+            close_cursor(connection, cursor)
+
+def calculate_average_age(verify=False):
+    """Calculates average age from the maintained age statistics
+
+    The statistics are read from the user_age_histogram table in O(1).
+    With verify=True, or when no statistics have been recorded yet,
+    the ages are streamed through a full scan instead, and a mismatch
+    with the maintained statistics is reported.
+    """
+    with pooled_connection() as connection:
+        if not connection:
+            return
+        try:
+            stats = load_stats(connection)
+        except mysql.connector.Error:
+            stats = AgeStats()
+
+    if verify or not stats.count:
+        scanned = AgeStats.from_ages(stream_user_ages())
+        if stats.count and scanned != stats:
+            print("Maintained age statistics are stale, "
+                  "run stats.rebuild_stats() to refresh them")
+        stats = scanned
+
+    if stats.count > 0:
+        print(f"Average age of users: {stats.mean():.2f}")
     else:
         print("No users found in the database")
 
+def summarize_ages(batch_size=None):
+    """Computes all age statistics in one pass over the table
+
+    Returns a sketches.StreamingStats holding mean, variance, min/max,
+    approximate percentiles, a histogram and a reservoir sample. With
+    batch_size set the ages arrive as NumPy batches and are folded in
+    vectorized.
+    """
+    stats = StreamingStats()
+    if batch_size:
+        for batch in stream_user_columns(batch_size, Query(columns=['age'])):
+            stats.update_batch(batch['age'])
+    else:
+        for age in stream_user_ages():
+            stats.update(age)
+    return stats
+
 if __name__ == "__main__":
     calculate_average_age()
\ No newline at end of file
@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+"""Async counterparts of the user_data streaming generators
+
+With aiomysql installed the scans run on an async connection pool with
+server-side cursors. Without it the blocking generators are driven
+from worker threads one chunk at a time. Either way the next chunk is
+only fetched when the consumer asks for it, so a slow consumer holds
+back its own scan without blocking the event loop.
+"""
+import asyncio
+import os
+import weakref
+
+from query import ALL_USERS, Query
+from seed import get_pool
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+paginate_users = __import__('2-lazy_paginate').paginate_users
+
+AGES = Query(columns=['age'])
+
+_pools = weakref.WeakKeyDictionary()
+_pools_lock = weakref.WeakKeyDictionary()
+_slots = weakref.WeakKeyDictionary()
+
+
+async def get_async_pool():
+    """Returns the aiomysql pool of the running event loop"""
+    loop = asyncio.get_running_loop()
+    lock = _pools_lock.setdefault(loop, asyncio.Lock())
+    async with lock:
+        if loop not in _pools:
+            _pools[loop] = await aiomysql.create_pool(
+                host=os.getenv('DB_HOST', 'localhost'),
+                user=os.getenv('DB_USER', 'postgres'),
+                password=os.getenv('DB_PASSWORD', 'postgres'),
+                db=os.getenv('DB_NAME', 'ALX_prodev'),
+                maxsize=int(os.getenv('DB_POOL_SIZE', '5')),
+                pool_recycle=float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))
+            )
+        return _pools[loop]
+
+
+async def _fetch_chunks(sql, params, chunk_size):
+    """Yields lists of row dicts from a server-side aiomysql cursor"""
+    pool = await get_async_pool()
+    async with pool.acquire() as connection:
+        cursor = await connection.cursor(aiomysql.SSDictCursor)
+        await cursor.execute(sql, params)
+        finished = False
+        try:
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+            finished = True
+        finally:
+            if finished:
+                await cursor.close()
+            else:
+                # Closing the cursor would drain the unread rows first
+                connection.close()
+
+
+def _scan_slots():
+    """Returns the running loop's limit on thread-offloaded scans
+
+    Each offloaded scan holds a pooled connection for its lifetime, so
+    scans beyond the pool size wait here, on the event loop, instead
+    of parking executor threads that the running scans need.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _slots:
+        _slots[loop] = asyncio.Semaphore(get_pool().max_size)
+    return _slots[loop]
+
+
+async def _offload(items):
+    """Drives a blocking iterator from worker threads, item by item"""
+    sentinel = object()
+    async with _scan_slots():
+        try:
+            while True:
+                item = await asyncio.to_thread(next, items, sentinel)
+                if item is sentinel:
+                    return
+                yield item
+        finally:
+            await asyncio.to_thread(items.close)
+
+
+def _chunks(query, chunk_size):
+    if aiomysql is not None:
+        return _fetch_chunks(*query.to_sql(), chunk_size)
+    return _offload(stream_users_in_batches(chunk_size, query))
+
+
+async def stream_users_async(chunk_size=1000, query=ALL_USERS):
+    """Async generator that streams rows from user_data table"""
+    async for rows in _chunks(query, chunk_size):
+        for row in rows:
+            yield row
+
+
+async def stream_users_in_batches_async(batch_size, query=ALL_USERS):
+    """Fetches users in batches without blocking the event loop"""
+    async for batch in _chunks(query, batch_size):
+        yield batch
+
+
+async def paginate_users_async(page_size, offset):
+    """Fetches one page of user_data with LIMIT/OFFSET"""
+    if aiomysql is None:
+        async with _scan_slots():
+            return await asyncio.to_thread(paginate_users, page_size, offset)
+    pool = await get_async_pool()
+    async with pool.acquire() as connection:
+        async with connection.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(
+                "SELECT user_id, name, email, age FROM user_data "
+                "LIMIT %s OFFSET %s", (page_size, offset))
+            return await cursor.fetchall()
+
+
+async def lazy_paginate_async(page_size):
+    """Async generator for lazy loading paginated data"""
+    offset = 0
+    while True:
+        page = await paginate_users_async(page_size, offset)
+        if not page:
+            break
+        yield page
+        offset += page_size
+
+
+async def stream_user_ages_async(chunk_size=1000):
+    """Async generator that yields user ages one by one"""
+    async for rows in _chunks(AGES, chunk_size):
+        for row in rows:
+            yield row['age']
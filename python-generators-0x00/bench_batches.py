@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+"""Compares dict-per-row and columnar NumPy batches
+
+Reports bytes held per batch and age > 25 filter throughput.
+Usage: ./bench_batches.py [table_rows] [batch_size]
+"""
+import sys
+
+import numpy as np
+
+import seed
+from bench_utils import populate, timed
+
+batches = __import__('1-batch_processing')
+
+
+def dict_batch_bytes(batch):
+    """Approximate bytes held by a list of row dicts"""
+    total = sys.getsizeof(batch)
+    for row in batch:
+        total += sys.getsizeof(row)
+        total += sum(sys.getsizeof(value) for value in row.values())
+    return total
+
+
+def column_batch_bytes(batch):
+    """Bytes held by a dict of NumPy column arrays"""
+    return sys.getsizeof(batch) + sum(values.nbytes
+                                      for values in batch.values())
+
+
+def filter_dicts(batch_size):
+    """Counts users over 25 row by row; returns (rows, matches)"""
+    rows = matches = 0
+    for batch in batches.stream_users_in_batches(batch_size):
+        rows += len(batch)
+        matches += sum(1 for user in batch if user['age'] > 25)
+    return rows, matches
+
+
+def filter_columns(batch_size):
+    """Counts users over 25 per batch with NumPy; returns (rows, matches)"""
+    rows = matches = 0
+    for batch in batches.stream_user_columns(batch_size):
+        rows += len(batch['age'])
+        matches += int(np.count_nonzero(batch['age'] > 25))
+    return rows, matches
+
+
+def main(rows, batch_size):
+    connection = seed.connect_to_prodev()
+    populate(connection, rows)
+    connection.close()
+
+    dict_bytes = dict_batch_bytes(
+        next(batches.stream_users_in_batches(batch_size)))
+    column_bytes = column_batch_bytes(
+        next(batches.stream_user_columns(batch_size)))
+    (count, _), dict_time = timed(filter_dicts, batch_size)
+    _, column_time = timed(filter_columns, batch_size)
+
+    print(f"{'mode':<10} {'KiB/batch':>10} {'rows/sec':>12}")
+    print(f"{'dicts':<10} {dict_bytes / 1024:>10.1f} "
+          f"{count / dict_time:>12.0f}")
+    print(f"{'columns':<10} {column_bytes / 1024:>10.1f} "
+          f"{count / column_time:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 10000)
@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+"""Compares DictReader and memory-mapped parallel CSV parsing
+
+Parsing only, no database needed.
+Usage: ./bench_csv.py [rows] [workers] (default: 5000000, all cores)
+"""
+import os
+import sys
+import tempfile
+
+from bench_insert import write_csv
+from bench_utils import timed
+from csv_parallel import read_csv_parallel
+from seed import read_csv_chunks
+
+
+def count(chunks):
+    return sum(len(chunk) for chunk in chunks)
+
+
+def main(rows, workers):
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        write_csv(path, rows)
+        megabytes = os.path.getsize(path) / (1 << 20)
+        print(f"{'parser':<16} {'rows/sec':>12} {'MiB/sec':>9}")
+        for name, chunks in (
+                ('DictReader', lambda: read_csv_chunks(path, 1000)),
+                (f'mmap x{workers}', lambda: read_csv_parallel(path, workers))):
+            parsed, elapsed = timed(count, chunks())
+            print(f"{name:<16} {parsed / elapsed:>12.0f} "
+                  f"{megabytes / elapsed:>9.1f}")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count())
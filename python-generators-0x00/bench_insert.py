@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""Measures seed.insert_data throughput on synthetic CSV files
+
+Also times re-importing the same file with and without dedup.
+
+Usage: ./bench_insert.py [rows ...] (default: 100000 5000000)
+"""
+import csv
+import os
+import sys
+import tempfile
+
+import seed
+from bench_utils import synthetic_rows, timed
+from stats import create_stats_table
+
+# (chunk_size, workers); one-row chunks approximate the old per-row loop
+CONFIGS = ((1, 1), (1000, 1), (1000, 4))
+ROW_BY_ROW_LIMIT = 100000
+
+
+def write_csv(path, count):
+    """Writes count synthetic users to path in the seed CSV layout"""
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['user_id', 'name', 'email', 'age'])
+        writer.writerows(synthetic_rows(count))
+
+
+def main(sizes):
+    for size in sizes:
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            write_csv(path, size)
+            for chunk_size, workers in CONFIGS:
+                if chunk_size == 1 and size > ROW_BY_ROW_LIMIT:
+                    continue
+                connection = seed.connect_to_prodev()
+                create_stats_table(connection)
+                cursor = connection.cursor()
+                cursor.execute("TRUNCATE TABLE user_data")
+                cursor.execute("TRUNCATE TABLE user_age_histogram")
+                cursor.close()
+                _, elapsed = timed(seed.insert_data, connection, path,
+                                   chunk_size=chunk_size, workers=workers)
+                connection.close()
+                print(f"{size:>10} rows  chunk={chunk_size:<5} "
+                      f"workers={workers:<2} {size / elapsed:>12.0f} rows/sec")
+            # The table now holds every row: time a full re-delivery
+            for dedup in (False, True):
+                connection = seed.connect_to_prodev()
+                _, elapsed = timed(seed.insert_data, connection, path,
+                                   dedup=dedup)
+                connection.close()
+                print(f"{size:>10} rows  re-import dedup={dedup!s:<5} "
+                      f"{size / elapsed:>12.0f} rows/sec")
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100000, 5000000])
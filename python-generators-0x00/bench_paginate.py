@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""Compares OFFSET and keyset page latency at increasing depths
+
+Usage: ./bench_paginate.py [table_rows] (default: 1100000)
+"""
+import sys
+
+import seed
+from bench_utils import populate, timed
+
+lazy_paginate = __import__('2-lazy_paginate')
+
+PAGE_SIZE = 100
+DEPTHS = (0, 100000, 1000000)
+REPEAT = 5
+
+
+def token_at(depth):
+    """Returns a keyset token positioned after the first depth rows"""
+    if depth == 0:
+        return None
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute("SELECT * FROM user_data ORDER BY user_id "
+                   "LIMIT 1 OFFSET %s", (depth - 1,))
+    row = cursor.fetchone()
+    cursor.close()
+    connection.close()
+    return lazy_paginate.encode_token("user_id", row)
+
+
+def best_of(func, *args):
+    """Returns the fastest of REPEAT calls in milliseconds"""
+    return min(timed(func, *args)[1] for _ in range(REPEAT)) * 1000
+
+
+def main(rows):
+    connection = seed.connect_to_prodev()
+    populate(connection, rows)
+    connection.close()
+    print(f"{'offset':>10} {'OFFSET ms':>12} {'keyset ms':>12}")
+    for depth in DEPTHS:
+        offset_ms = best_of(lazy_paginate.paginate_users, PAGE_SIZE, depth)
+        keyset_ms = best_of(lazy_paginate.paginate_users_after,
+                            PAGE_SIZE, token_at(depth))
+        print(f"{depth:>10} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1100000)
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""Measures how stream_users_parallel scales with the worker count
+
+Workers decode rows in parallel, but every row is still unpickled by
+the consuming process on one core. The "ceiling" line measures that
+alone (a worker feeding synthetic chunks, no database), which bounds
+the rows/sec any number of workers can deliver.
+
+Usage: ./bench_parallel.py [table_rows] (default: 5000000)
+"""
+import multiprocessing
+import os
+import sys
+
+import seed
+from bench_utils import populate, synthetic_rows, timed
+from parallel_scan import QUEUE_CHUNKS, stream_users_parallel
+
+stream_users = __import__('0-stream_users').stream_users
+
+
+def count(rows):
+    return sum(1 for _ in rows)
+
+
+def _feed(out, rows, chunk_size):
+    columns = ("user_id", "name", "email", "age")
+    chunk = [dict(zip(columns, row)) for row in synthetic_rows(chunk_size)]
+    for _ in range(rows // chunk_size):
+        out.put(chunk)
+    out.put(None)
+
+
+def ceiling(rows, chunk_size=1000):
+    """Rows/sec the consumer can unpickle from the worker queue"""
+    out = multiprocessing.Queue(QUEUE_CHUNKS)
+    feeder = multiprocessing.Process(target=_feed,
+                                     args=(out, rows, chunk_size))
+    feeder.start()
+    received, elapsed = timed(
+        count, (row for chunk in iter(out.get, None) for row in chunk))
+    feeder.join()
+    return received / elapsed
+
+
+def main(rows):
+    connection = seed.connect_to_prodev()
+    populate(connection, rows)
+    connection.close()
+
+    total, baseline = timed(count, stream_users(chunk_size=1000))
+    print(f"{'workers':>8} {'rows/sec':>12} {'speedup':>8}")
+    print(f"{'serial':>8} {total / baseline:>12.0f} {1.0:>8.2f}")
+    workers = 1
+    while workers <= os.cpu_count():
+        _, elapsed = timed(count, stream_users_parallel(workers))
+        print(f"{workers:>8} {total / elapsed:>12.0f} "
+              f"{baseline / elapsed:>8.2f}")
+        workers *= 2
+    limit = ceiling(total)
+    print(f"{'ceiling':>8} {limit:>12.0f} {limit * baseline / total:>8.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000000)
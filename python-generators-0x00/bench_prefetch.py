@@ -0,0 +1,42 @@
+#!/usr/bin/python3
+"""Measures lazy_paginate throughput with and without read-ahead
+
+Each page is serialised to JSON to stand in for real page processing.
+Usage: ./bench_prefetch.py [table_rows] [page_size]
+"""
+import json
+import sys
+
+import seed
+from bench_utils import populate, timed
+
+lazy_paginate = __import__('2-lazy_paginate')
+
+
+def process(pages):
+    """Serialises every page; returns the number of pages seen"""
+    count = 0
+    for page in pages:
+        json.dumps(page, default=str)
+        count += 1
+    return count
+
+
+def main(rows, page_size):
+    connection = seed.connect_to_prodev()
+    populate(connection, rows)
+    connection.close()
+
+    print(f"{'prefetch':>8} {'pages/sec':>12} {'speedup':>8}")
+    baseline = None
+    for depth in (0, 1, 2, 4):
+        pages, elapsed = timed(process, lazy_paginate.lazy_paginate_keyset(
+            page_size, prefetch=depth))
+        baseline = baseline or elapsed
+        print(f"{depth:>8} {pages / elapsed:>12.1f} "
+              f"{baseline / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
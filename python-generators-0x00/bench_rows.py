@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""Compares dict rows with compact records in stream_users
+
+Reports bytes per row held in memory and rows/sec for a full scan.
+Usage: ./bench_rows.py [table_rows] (default: 1000000)
+"""
+import itertools
+import sys
+import tracemalloc
+
+import seed
+from bench_utils import populate, timed
+
+stream_users = __import__('0-stream_users').stream_users
+
+SAMPLE = 100000
+
+
+def bytes_per_row(compact):
+    """Traced bytes per row while SAMPLE rows are held in a list"""
+    tracemalloc.start()
+    rows = list(itertools.islice(
+        stream_users(chunk_size=1000, compact=compact), SAMPLE))
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return held / len(rows)
+
+
+def scan(compact):
+    return sum(1 for _ in stream_users(chunk_size=1000, compact=compact))
+
+
+def main(rows):
+    connection = seed.connect_to_prodev()
+    populate(connection, rows)
+    connection.close()
+
+    print(f"{'mode':<8} {'bytes/row':>10} {'rows/sec':>12}")
+    for compact in (False, True):
+        count, elapsed = timed(scan, compact)
+        print(f"{'records' if compact else 'dicts':<8} "
+              f"{bytes_per_row(compact):>10.0f} {count / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
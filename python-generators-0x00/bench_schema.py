@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""Times the generator filter queries before and after the schema migration
+
+Recreates user_data with the original schema (DECIMAL age, no
+secondary indexes), fills it, times the queries, runs
+seed.migrate_user_data and times them again.
+Usage: ./bench_schema.py [table_rows] (default: 1000000)
+"""
+import sys
+
+import seed
+from bench_utils import populate, timed
+
+LEGACY_TABLE = """
+    CREATE TABLE user_data (
+        user_id VARCHAR(36) PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        age DECIMAL NOT NULL,
+        INDEX idx_user_id (user_id)
+    )
+"""
+QUERIES = (
+    ("age > 25 count", "SELECT COUNT(*) FROM user_data WHERE age > %s", (25,)),
+    ("age > 25 rows",
+     "SELECT user_id, name, email, age FROM user_data WHERE age > %s", (25,)),
+    ("age = 30 rows",
+     "SELECT user_id, name, email, age FROM user_data WHERE age = %s", (30,)),
+    ("email lookup",
+     "SELECT user_id, name, email, age FROM user_data WHERE email = %s",
+     ("user123456@example.com",)),
+)
+REPEAT = 3
+
+
+def run(cursor, sql, params):
+    cursor.execute(sql, params)
+    return cursor.fetchall()
+
+
+def time_queries(connection):
+    """Returns the best-of-REPEAT milliseconds for each query"""
+    cursor = connection.cursor()
+    times = [min(timed(run, cursor, sql, params)[1] for _ in range(REPEAT))
+             * 1000 for _, sql, params in QUERIES]
+    cursor.close()
+    return times
+
+
+def main(rows):
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    cursor.execute("DROP TABLE IF EXISTS user_data")
+    cursor.execute(LEGACY_TABLE)
+    cursor.close()
+    populate(connection, rows)
+
+    before = time_queries(connection)
+    print("Applied:", ", ".join(seed.migrate_user_data(connection)))
+    after = time_queries(connection)
+    connection.close()
+
+    print(f"{'query':<16} {'before ms':>10} {'after ms':>10}")
+    for (name, _, _), old, new in zip(QUERIES, before, after):
+        print(f"{name:<16} {old:>10.1f} {new:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
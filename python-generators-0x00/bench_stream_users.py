@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""Benchmarks a buffered cursor against the ways stream_users streams
+
+The baseline reads the whole result into client memory with
+cursor(buffered=True). stream_users itself never buffers: by default
+it fetches row by row from mysql.connector's unbuffered cursor, with
+chunk_size through fetchmany.
+
+Usage: ./bench_stream_users.py [rows ...] (default: 1000000 10000000)
+"""
+import sys
+
+import seed
+from bench_utils import peak_rss_mb, populate, run_isolated, timed
+from query import ALL_USERS
+
+stream_users = __import__('0-stream_users').stream_users
+
+# label -> stream_users chunk_size, or "buffered" for the baseline
+MODES = {
+    "buffered": "buffered",
+    "row-by-row": None,
+    "chunk=1000": 1000,
+    "chunk=10000": 10000,
+}
+
+
+def buffered_rows():
+    """Yields every row from a buffered cursor (the whole result first)"""
+    sql, params = ALL_USERS.to_sql()
+    with seed.pooled_connection() as connection:
+        cursor = connection.cursor(dictionary=True, buffered=True)
+        cursor.execute(sql, params)
+        yield from cursor
+        cursor.close()
+
+
+def scan(mode):
+    """Consumes one mode's rows and returns (rows, seconds, peak RSS)"""
+    baseline = peak_rss_mb()
+    rows = buffered_rows() if mode == "buffered" else stream_users(mode)
+    count, elapsed = timed(lambda: sum(1 for _ in rows))
+    return count, elapsed, peak_rss_mb() - baseline
+
+
+def main(sizes):
+    for size in sizes:
+        connection = seed.connect_to_prodev()
+        populate(connection, size)
+        connection.close()
+        for label, mode in MODES.items():
+            count, elapsed, rss = run_isolated(scan, mode)
+            print(f"{size:>10} rows  {label:<12} "
+                  f"{count / elapsed:>12.0f} rows/sec  "
+                  f"peak RSS +{rss:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000000, 10000000])
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""Shared helpers for the user_data benchmarks"""
+import resource
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from stats import create_stats_table, rebuild_stats
+
+FIRST_NAMES = ["Dan", "Ada", "Lee", "Sam", "Kim", "Ola", "Tom", "Eve"]
+
+
+def synthetic_rows(count, start=0):
+    """Yields count synthetic (user_id, name, email, age) tuples"""
+    for i in range(start, start + count):
+        name = f"{FIRST_NAMES[i % len(FIRST_NAMES)]} User{i}"
+        email = f"user{i}@example.com"
+        yield (str(uuid.UUID(int=i)), name, email, 18 + i % 83)
+
+
+def populate(connection, count, batch_size=10000):
+    """Replaces the contents of user_data with count synthetic rows
+
+    The age histogram is rebuilt afterwards so it matches the new rows.
+    """
+    cursor = connection.cursor()
+    cursor.execute("TRUNCATE TABLE user_data")
+    batch = []
+    for row in synthetic_rows(count):
+        batch.append(row)
+        if len(batch) == batch_size:
+            cursor.executemany(
+                "INSERT INTO user_data (user_id, name, email, age) "
+                "VALUES (%s, %s, %s, %s)", batch)
+            connection.commit()
+            batch = []
+    if batch:
+        cursor.executemany(
+            "INSERT INTO user_data (user_id, name, email, age) "
+            "VALUES (%s, %s, %s, %s)", batch)
+        connection.commit()
+    cursor.close()
+    create_stats_table(connection)
+    rebuild_stats(connection)
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MiB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed(func, *args, **kwargs):
+    """Calls func and returns (result, elapsed seconds)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_isolated(func, *args):
+    """Runs func in a fresh process so its peak RSS is its own"""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(func, *args).result()
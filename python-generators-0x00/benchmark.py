@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+"""Benchmark harness for the user_data access strategies
+
+Seeds a synthetic user_data table, runs every access pattern in a
+fresh process and reports rows/sec, latency per item (row, batch or
+page), peak RSS and connections opened. Results are printed as a
+table and appended as JSON lines to --output for regression tracking.
+
+    ./benchmark.py --rows 200000 --backend sqlite --output results.jsonl
+
+The sqlite backend runs the generators against a local file through
+sqlite_standin.py; the mysql backend uses the DB_* settings and
+replaces the contents of user_data.
+"""
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import seed
+import sqlite_standin
+from bench_utils import peak_rss_mb, populate, run_isolated, synthetic_rows
+from sketches import QuantileSketch
+
+stream_users = __import__('0-stream_users').stream_users
+batch_processing = __import__('1-batch_processing')
+lazy_paginate = __import__('2-lazy_paginate')
+stream_user_ages = __import__('4-stream_ages').stream_user_ages
+
+BATCH_SIZE = 1000
+
+# name -> (start the scan, rows carried by one yielded item)
+PATTERNS = {
+    'stream_users': (lambda: stream_users(), lambda item: 1),
+    'stream_users_chunked': (
+        lambda: stream_users(chunk_size=BATCH_SIZE), lambda item: 1),
+    'stream_users_compact': (
+        lambda: stream_users(chunk_size=BATCH_SIZE, compact=True),
+        lambda item: 1),
+    'stream_users_in_batches': (
+        lambda: batch_processing.stream_users_in_batches(BATCH_SIZE), len),
+    'stream_user_columns': (
+        lambda: batch_processing.stream_user_columns(BATCH_SIZE),
+        lambda item: len(item['age'])),
+    'lazy_paginate': (lambda: lazy_paginate.lazy_paginate(BATCH_SIZE), len),
+    'lazy_paginate_keyset': (
+        lambda: lazy_paginate.lazy_paginate_keyset(BATCH_SIZE),
+        lambda item: len(item[0])),
+    'lazy_paginate_prefetch': (
+        lambda: lazy_paginate.lazy_paginate_keyset(BATCH_SIZE, prefetch=2),
+        lambda item: len(item[0])),
+    'stream_user_ages': (lambda: stream_user_ages(), lambda item: 1),
+}
+
+
+def _use_backend(backend, sqlite_path):
+    """Points the generators' pool at the chosen backend"""
+    if backend == 'sqlite':
+        seed.configure_pool(
+            functools.partial(sqlite_standin.Connection, sqlite_path))
+    else:
+        seed.configure_pool(seed._open_prodev)
+
+
+def run_pattern(name, backend, sqlite_path):
+    """Runs one access pattern to completion and returns its metrics
+
+    Meant to run in a fresh process (see bench_utils.run_isolated) so
+    peak RSS and the connection count belong to this pattern alone.
+    """
+    _use_backend(backend, sqlite_path)
+    start_scan, rows_in = PATTERNS[name]
+    baseline_rss = peak_rss_mb()
+    latencies = QuantileSketch()
+    items = rows = 0
+    slowest = 0.0
+
+    started = last = time.perf_counter()
+    for item in start_scan():
+        now = time.perf_counter()
+        latency = (now - last) * 1000
+        latencies.update(latency)
+        slowest = max(slowest, latency)
+        items += 1
+        rows += rows_in(item)
+        last = time.perf_counter()
+    seconds = time.perf_counter() - started
+
+    return {
+        'pattern': name,
+        'items': items,
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds else None,
+        'latency_ms': {
+            'mean': seconds * 1000 / items if items else None,
+            'p50': latencies.quantile(0.5),
+            'p95': latencies.quantile(0.95),
+            'max': slowest,
+        },
+        'peak_rss_mb': peak_rss_mb() - baseline_rss,
+        'connections': seed.get_pool().stats()['created'],
+    }
+
+
+def seed_backend(backend, rows, sqlite_path):
+    if backend == 'sqlite':
+        sqlite_standin.create_database(sqlite_path, synthetic_rows(rows))
+    else:
+        connection = seed.connect_to_prodev()
+        populate(connection, rows)
+        connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--backend', choices=('sqlite', 'mysql'),
+                        default='sqlite')
+    parser.add_argument('--sqlite-path', default=None,
+                        help='database file (default: a temporary file)')
+    parser.add_argument('--patterns', nargs='+', choices=sorted(PATTERNS),
+                        default=list(PATTERNS))
+    parser.add_argument('--output', help='append JSON lines results here')
+    args = parser.parse_args(argv)
+
+    sqlite_path = args.sqlite_path
+    temporary = args.backend == 'sqlite' and sqlite_path is None
+    if temporary:
+        fd, sqlite_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+    try:
+        seed_backend(args.backend, args.rows, sqlite_path)
+        run_at = datetime.now(timezone.utc).isoformat()
+        results = []
+        print(f"{'pattern':<24} {'rows/sec':>12} {'p50 ms':>9} "
+              f"{'p95 ms':>9} {'RSS MiB':>8} {'conns':>6}")
+        for name in args.patterns:
+            result = run_isolated(run_pattern, name, args.backend,
+                                  sqlite_path)
+            result.update(backend=args.backend, table_rows=args.rows,
+                          timestamp=run_at)
+            results.append(result)
+            latency = result['latency_ms']
+            print(f"{name:<24} {result['rows_per_sec']:>12.0f} "
+                  f"{latency['p50']:>9.3f} {latency['p95']:>9.3f} "
+                  f"{result['peak_rss_mb']:>8.1f} "
+                  f"{result['connections']:>6}")
+        if args.output:
+            with open(args.output, 'a') as file:
+                for result in results:
+                    file.write(json.dumps(result) + '\n')
+    finally:
+        if temporary:
+            os.remove(sqlite_path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
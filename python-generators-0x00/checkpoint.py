@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""Resumable user_data scans with checkpoints in a local file
+
+Rows are streamed in user_id order and the user_id of the last row
+the consumer finished with is saved every N rows. Starting the same
+scan again with the same checkpoint file seeks straight past that key
+instead of re-reading what was already processed.
+"""
+import os
+
+from query import ALL_USERS, narrowed
+
+stream_users = __import__('0-stream_users').stream_users
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+
+
+class Checkpoint:
+    """Last processed user_id of a scan, kept in a local file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """Returns the saved user_id, or None to start from scratch"""
+        try:
+            with open(self.path, 'r') as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def save(self, user_id):
+        """Atomically replaces the saved user_id"""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as file:
+            file.write(user_id)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def resume_query(query, checkpoint):
+    """Returns query ordered by user_id, starting after the checkpoint"""
+    if 'user_id' not in query.columns:
+        raise ValueError("Resumable scans need user_id in the projection")
+    last = checkpoint.load()
+    where = [('user_id', '>', last)] if last is not None else []
+    return narrowed(query, where, 'user_id')
+
+
+def stream_users_resumable(path, every=10000, chunk_size=1000,
+                           query=ALL_USERS):
+    """Generator streaming user_data rows, resumable from path
+
+    A row counts as processed once the consumer asks for the next one,
+    so a crash never skips a row that was handed out but not finished.
+    The checkpoint is removed when the scan completes.
+    """
+    checkpoint = Checkpoint(path)
+    last, pending = None, 0
+    for row in stream_users(chunk_size, resume_query(query, checkpoint)):
+        yield row
+        last, pending = row['user_id'], pending + 1
+        if pending >= every:
+            checkpoint.save(last)
+            pending = 0
+    checkpoint.clear()
+
+
+def stream_users_in_batches_resumable(path, batch_size, every=10000,
+                                      query=ALL_USERS):
+    """Fetches users in batches, resumable from path
+
+    The checkpoint moves forward by whole batches once at least every
+    rows have been processed since the last save.
+    """
+    checkpoint = Checkpoint(path)
+    pending = 0
+    for batch in stream_users_in_batches(batch_size,
+                                         resume_query(query, checkpoint)):
+        yield batch
+        pending += len(batch)
+        if pending >= every:
+            checkpoint.save(batch[-1]['user_id'])
+            pending = 0
+    checkpoint.clear()
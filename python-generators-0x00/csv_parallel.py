@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""Memory-mapped CSV parsing spread over a process pool
+
+The file is mapped, cut into byte ranges that end on line boundaries
+and each range is parsed by a worker process into typed
+(user_id, name, email, age) tuples. Fields are assumed not to contain
+embedded newlines, which holds for the user_data dumps.
+"""
+import csv
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from stats import round_age
+
+COLUMNS = ('user_id', 'name', 'email', 'age')
+
+
+def line_ranges(csv_file, range_bytes):
+    """Returns the header line and (start, end) byte ranges after it
+
+    Every range ends just after a newline (or at the end of the file),
+    so no row is split between two ranges.
+    """
+    if os.path.getsize(csv_file) == 0:
+        return b'', []
+    with open(csv_file, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        size = len(data)
+        start = data.find(b'\n') + 1 or size
+        header = data[:start]
+        ranges = []
+        while start < size:
+            end = min(start + range_bytes, size)
+            if end < size:
+                newline = data.find(b'\n', end - 1)
+                end = size if newline == -1 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+def _parse_range(csv_file, start, end, indexes):
+    """Worker: parses one byte range into typed user tuples"""
+    with open(csv_file, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        text = data[start:end].decode('utf-8')
+    user_id, name, email, age = indexes
+    return [
+        (record[user_id], record[name], record[email],
+         round_age(record[age]))
+        for record in csv.reader(io.StringIO(text)) if record
+    ]
+
+
+def read_csv_parallel(csv_file, workers=None, range_bytes=8 << 20):
+    """Yields lists of typed user tuples parsed by worker processes
+
+    Lists come out in file order, one per byte range. At most twice
+    workers ranges are parsed ahead of the consumer, which bounds
+    memory however large the file is.
+    """
+    header, ranges = line_ranges(csv_file, range_bytes)
+    if not ranges:
+        return
+    names = next(csv.reader([header.decode('utf-8')]))
+    indexes = tuple(names.index(column) for column in COLUMNS)
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for start, end in ranges:
+            pending.append(executor.submit(
+                _parse_range, csv_file, start, end, indexes))
+            if len(pending) >= workers * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def rechunk(batches, chunk_size):
+    """Regroups an iterable of lists into lists of chunk_size items"""
+    chunk = []
+    for batch in batches:
+        for row in batch:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""Columnar snapshots of user_data in Arrow IPC or Parquet files
+
+export_users writes the batches of stream_users_in_batches straight
+into the file, one record batch (Arrow) or row group (Parquet) per
+batch, so memory stays bounded by the batch size. read_users streams
+a snapshot back in the same list-of-dicts batches, which lets jobs be
+replayed and benchmarked without touching MySQL.
+"""
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from query import ALL_USERS
+
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+
+FIELDS = {
+    'user_id': pa.string(),
+    'name': pa.string(),
+    'email': pa.string(),
+    'age': pa.uint8(),
+    'seq': pa.uint64(),
+}
+
+
+def _format(path, file_format):
+    if file_format is None:
+        file_format = 'parquet' if str(path).endswith('.parquet') else 'arrow'
+    if file_format not in ('arrow', 'parquet'):
+        raise ValueError(f"Unknown snapshot format: {file_format!r}")
+    return file_format
+
+
+def export_users(path, batch_size=10000, query=ALL_USERS, file_format=None):
+    """Writes the users selected by query to a columnar file
+
+    file_format is 'arrow' or 'parquet', guessed from the extension
+    when omitted. Returns the number of rows written.
+    """
+    file_format = _format(path, file_format)
+    schema = pa.schema([(column, FIELDS[column]) for column in query.columns])
+    if file_format == 'parquet':
+        writer = pq.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    rows = 0
+    try:
+        for batch in stream_users_in_batches(batch_size, query):
+            record_batch = pa.RecordBatch.from_pylist(batch, schema=schema)
+            if file_format == 'parquet':
+                writer.write_batch(record_batch, row_group_size=batch_size)
+            else:
+                writer.write_batch(record_batch)
+            rows += len(batch)
+    finally:
+        writer.close()
+    return rows
+
+
+def read_users(path, batch_size=10000, file_format=None):
+    """Streams a snapshot back as batches of user dicts
+
+    Arrow files are memory-mapped and Parquet files read batch by
+    batch, so only one batch is materialised at a time.
+    """
+    if _format(path, file_format) == 'parquet':
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size):
+            yield record_batch.to_pylist()
+        return
+    with pa.memory_map(str(path)) as source:
+        reader = pa.ipc.open_file(source)
+        for index in range(reader.num_record_batches):
+            record_batch = reader.get_batch(index)
+            for start in range(0, record_batch.num_rows, batch_size):
+                yield record_batch.slice(start, batch_size).to_pylist()
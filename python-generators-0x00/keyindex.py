@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""In-memory indexes of the user_ids already in user_data
+
+seed.insert_data uses them to drop re-delivered rows before they are
+sent. KeySet is exact; BloomFilter trades exactness for a fixed,
+small footprint on huge tables and can only rule keys out, so rows it
+reports as maybe present are still checked against the database.
+Both are shared by the insert workers; hold lock while using one.
+"""
+import hashlib
+import math
+import threading
+
+BLOOM_THRESHOLD = 5000000
+
+
+class KeySet:
+    """Exact set of keys"""
+
+    exact = True
+
+    def __init__(self):
+        self.keys = set()
+        self.lock = threading.Lock()
+
+    def add(self, key):
+        self.keys.add(key)
+
+    def might_contain(self, key):
+        return key in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class BloomFilter:
+    """Bloom filter sized for capacity keys at the given error rate"""
+
+    exact = False
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = math.ceil(-capacity * math.log(error_rate)
+                              / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        # add() is a read-modify-write of shared bytes
+        self.lock = threading.Lock()
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def might_contain(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+
+def load_keys(connection, expected_new=0, threshold=BLOOM_THRESHOLD,
+              chunk_size=10000):
+    """Builds a key index from one key-only scan of user_data
+
+    Tables (plus expected_new incoming rows) larger than threshold get
+    a BloomFilter, smaller ones an exact KeySet. The filter is sized for
+    both, since every row loaded is added to it; sized for the existing
+    keys alone, its false-positive rate would climb as the load went on.
+    """
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM user_data")
+    (existing,) = cursor.fetchone()
+    total = existing + expected_new
+    keys = BloomFilter(total) if total > threshold else KeySet()
+    cursor.execute("SELECT user_id FROM user_data")
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        for (user_id,) in rows:
+            keys.add(user_id)
+    cursor.close()
+    return keys
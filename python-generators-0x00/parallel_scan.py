@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+"""Range-partitioned parallel scan of user_data over a process pool"""
+import multiprocessing
+import os
+import queue
+import traceback
+
+from query import ALL_USERS, narrowed
+from seed import close_cursor, connect_to_prodev, pooled_connection
+
+QUEUE_CHUNKS = 4
+
+
+def partition_ranges(parts):
+    """Splits user_id into up to parts (low, high) ranges of similar size
+
+    None stands for an open end. Boundaries come from one index-only
+    walk of the primary key, numbering the rows and keeping the first
+    of each part, so each range holds about the same number of rows
+    whatever the key distribution.
+    """
+    with pooled_connection() as connection:
+        if not connection:
+            return []
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT user_id FROM (
+                SELECT user_id,
+                       ROW_NUMBER() OVER (ORDER BY user_id) - 1 AS n,
+                       COUNT(*) OVER () AS total
+                FROM user_data
+            ) numbered
+            WHERE n > 0 AND n * %s DIV total > (n - 1) * %s DIV total
+            ORDER BY user_id
+        """, (parts, parts))
+        bounds = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+    edges = [None] + bounds + [None]
+    return list(zip(edges, edges[1:]))
+
+
+def _range_query(query, low, high, ordered):
+    where = []
+    if low is not None:
+        where.append(("user_id", ">=", low))
+    if high is not None:
+        where.append(("user_id", "<", high))
+    return narrowed(query, where, "user_id" if ordered else None)
+
+
+def _scan_range(query, chunk_size, out):
+    """Worker: streams the rows of query into out, chunk by chunk
+
+    Puts None when done, or a RuntimeError describing a failure.
+    """
+    try:
+        connection = connect_to_prodev()
+        if not connection:
+            raise RuntimeError("Could not connect to ALX_prodev")
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        cursor.execute(*query.to_sql())
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            out.put(rows)
+        close_cursor(connection, cursor)
+        connection.close()
+        out.put(None)
+    except Exception:
+        out.put(RuntimeError(traceback.format_exc()))
+
+
+def _drain(out, processes):
+    """Yields the chunks a worker puts on out until its sentinel"""
+    while True:
+        try:
+            item = out.get(timeout=1)
+        except queue.Empty:
+            if any(process.is_alive() for process in processes):
+                continue
+            raise RuntimeError("Scan worker exited without finishing")
+        if item is None:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def stream_users_parallel(workers=None, ordered=False, query=ALL_USERS,
+                          chunk_size=1000):
+    """Streams user_data rows read by workers processes in parallel
+
+    Each worker scans one user_id range on its own connection. Rows
+    arrive as soon as any worker produces them, or in user_id order
+    when ordered is set, in which case later ranges wait behind a
+    bounded queue until the earlier ones have been consumed. A limit
+    in query applies per range.
+    """
+    workers = workers or os.cpu_count()
+    ranges = partition_ranges(workers)
+    context = multiprocessing.get_context()
+    if ordered:
+        queues = [context.Queue(QUEUE_CHUNKS) for _ in ranges]
+    else:
+        queues = [context.Queue(QUEUE_CHUNKS * len(ranges))] * len(ranges)
+    processes = [
+        context.Process(target=_scan_range, daemon=True,
+                        args=(_range_query(query, low, high, ordered),
+                              chunk_size, out))
+        for (low, high), out in zip(ranges, queues)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        if ordered:
+            for out, process in zip(queues, processes):
+                for rows in _drain(out, [process]):
+                    yield from rows
+        else:
+            for _ in processes:
+                for rows in _drain(queues[0], processes):
+                    yield from rows
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+"""Composable, instrumented generator pipelines
+
+    Pipeline(stream_users(chunk_size=1000), "users")
+        .filter(lambda user: user['age'] > 25, "over_25")
+        .map(lambda user: user['email'], "emails")
+        .batch(500)
+        .sink(write_batch)
+
+Every stage stays a lazy generator. Each one counts the items it takes
+in and hands out, the time spent in its own work (upstream and
+downstream time excluded) and the most items it held at once, so
+report() shows which stage a scan is waiting on.
+"""
+import time
+from collections import deque
+
+
+class StageStats:
+    """Counters kept for one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.seconds = 0.0
+        self.max_depth = 0
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "seconds": self.seconds,
+            "max_depth": self.max_depth,
+        }
+
+
+class Pipeline:
+    """Chain of lazy stages fed by a source iterable"""
+
+    def __init__(self, source, name="source"):
+        self.stages = []
+        self._items = self._source(iter(source), self._stage(name))
+
+    def map(self, func, name=None):
+        """Replaces every item with func(item)"""
+        stats = self._stage(name or getattr(func, '__name__', 'map'))
+        self._items = self._map(self._items, func, stats)
+        return self
+
+    def filter(self, predicate, name=None):
+        """Keeps only the items for which predicate(item) is true"""
+        stats = self._stage(name or getattr(predicate, '__name__', 'filter'))
+        self._items = self._filter(self._items, predicate, stats)
+        return self
+
+    def batch(self, size, name="batch"):
+        """Groups items into lists of up to size items"""
+        self._items = self._batch(self._items, size, self._stage(name))
+        return self
+
+    def window(self, size, step=1, name="window"):
+        """Emits a tuple of the last size items every step items"""
+        self._items = self._window(self._items, size, step, self._stage(name))
+        return self
+
+    def sink(self, func=None, name="sink"):
+        """Runs the pipeline to the end, passing each item to func
+
+        Returns the per-stage stats as a list of dicts.
+        """
+        stats = self._stage(name)
+        for item in self._items:
+            stats.items_in += 1
+            start = time.perf_counter()
+            if func is not None:
+                func(item)
+            stats.seconds += time.perf_counter() - start
+        return self.stats()
+
+    def __iter__(self):
+        return self._items
+
+    def stats(self):
+        return [stage.as_dict() for stage in self.stages]
+
+    def report(self):
+        """Returns the stage counters formatted as a table"""
+        lines = [f"{'stage':<16} {'in':>10} {'out':>10} "
+                 f"{'seconds':>9} {'depth':>6}"]
+        for stage in self.stages:
+            lines.append(f"{stage.name:<16} {stage.items_in:>10} "
+                         f"{stage.items_out:>10} {stage.seconds:>9.3f} "
+                         f"{stage.max_depth:>6}")
+        return "\n".join(lines)
+
+    def _stage(self, name):
+        stats = StageStats(name)
+        self.stages.append(stats)
+        return stats
+
+    @staticmethod
+    def _source(items, stats):
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                stats.seconds += time.perf_counter() - start
+                return
+            stats.seconds += time.perf_counter() - start
+            stats.items_in += 1
+            stats.items_out += 1
+            yield item
+
+    @staticmethod
+    def _map(items, func, stats):
+        for item in items:
+            stats.items_in += 1
+            start = time.perf_counter()
+            result = func(item)
+            stats.seconds += time.perf_counter() - start
+            stats.items_out += 1
+            yield result
+
+    @staticmethod
+    def _filter(items, predicate, stats):
+        for item in items:
+            stats.items_in += 1
+            start = time.perf_counter()
+            keep = predicate(item)
+            stats.seconds += time.perf_counter() - start
+            if keep:
+                stats.items_out += 1
+                yield item
+
+    @staticmethod
+    def _batch(items, size, stats):
+        batch = []
+        for item in items:
+            stats.items_in += 1
+            batch.append(item)
+            stats.max_depth = max(stats.max_depth, len(batch))
+            if len(batch) == size:
+                stats.items_out += 1
+                yield batch
+                batch = []
+        if batch:
+            stats.items_out += 1
+            yield batch
+
+    @staticmethod
+    def _window(items, size, step, stats):
+        window = deque(maxlen=size)
+        for item in items:
+            stats.items_in += 1
+            window.append(item)
+            stats.max_depth = len(window)
+            if len(window) == size and (stats.items_in - size) % step == 0:
+                stats.items_out += 1
+                yield tuple(window)
@@ -0,0 +1,180 @@
+#!/usr/bin/python3
+"""Thread-safe connection pool shared by the streaming generators"""
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be borrowed in time"""
+
+
+class ConnectionPool:
+    """Bounded pool of reusable database connections
+
+    factory opens a new connection. check is called on every borrow
+    of an idle connection and reset on every return; a connection for
+    which either returns False is closed with close and replaced.
+    Idle connections unused for idle_timeout seconds are closed.
+    """
+
+    def __init__(self, factory, max_size=5, idle_timeout=300.0,
+                 check=None, reset=None, close=None):
+        self._factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._check = check or (lambda connection: True)
+        self._reset = reset or (lambda connection: True)
+        self._close = close or (lambda connection: connection.close())
+        self._idle = []
+        self._size = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "borrows": 0,
+            "created": 0,
+            "discarded": 0,
+            "timeouts": 0,
+            "overflow": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+    def acquire(self, timeout=None):
+        """Borrows a connection, waiting up to timeout seconds for one"""
+        start = time.monotonic()
+        while True:
+            connection, stale = self._take(start, timeout)
+            for idle in stale:
+                self._discard(idle)
+            if connection is None:
+                try:
+                    connection = self._factory()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+                break
+            if self._healthy(connection):
+                break
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            self._discard(connection)
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._stats["borrows"] += 1
+            self._stats["wait_total"] += waited
+            self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+        return connection
+
+    def open_overflow(self):
+        """Opens a connection outside the pool, not counted in max_size
+
+        For callers that cannot wait for a pooled one; close it with
+        close_overflow() instead of releasing it.
+        """
+        connection = self._factory()
+        with self._cond:
+            self._stats["overflow"] += 1
+        return connection
+
+    def close_overflow(self, connection):
+        self._close(connection)
+
+    def release(self, connection):
+        """Returns a borrowed connection to the pool"""
+        try:
+            reusable = self._reset(connection)
+        except Exception:
+            reusable = False
+        with self._cond:
+            if reusable:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._size -= 1
+            self._cond.notify()
+        if not reusable:
+            self._discard(connection)
+
+    def connection(self, timeout=None):
+        """Context manager borrowing a connection for the with block"""
+        return _Borrowed(self, timeout)
+
+    def close(self):
+        """Closes every idle connection"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def stats(self):
+        """Returns a snapshot of the pool counters"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+        borrows = stats["borrows"]
+        stats["wait_avg"] = stats["wait_total"] / borrows if borrows else 0.0
+        return stats
+
+    def _take(self, start, timeout):
+        """Pops an idle connection or reserves a slot for a new one
+
+        Returns (connection, stale) where connection is None when the
+        caller should open a new one, and stale lists expired idle
+        connections to close outside the lock.
+        """
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                stale = []
+                while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                    stale.append(self._idle.pop(0)[0])
+                    self._size -= 1
+                if self._idle:
+                    return self._idle.pop()[0], stale
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, stale
+                remaining = None
+                if timeout is not None:
+                    remaining = timeout - (now - start)
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No connection available after {timeout}s")
+                self._cond.wait(remaining)
+
+    def _healthy(self, connection):
+        try:
+            return self._check(connection)
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        with self._cond:
+            self._stats["discarded"] += 1
+        try:
+            self._close(connection)
+        except Exception:
+            pass
+
+
+class _Borrowed:
+    """Context manager returned by ConnectionPool.connection"""
+
+    def __init__(self, pool, timeout):
+        self.pool = pool
+        self.timeout = timeout
+        self.conn = None
+
+    def __enter__(self):
+        self.conn = self.pool.acquire(self.timeout)
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.pool.release(self.conn)
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""Projection, predicate and limit pushdown for user_data scans"""
+
+COLUMNS = ("user_id", "name", "email", "age")
+# Not selected by default, but may be projected, filtered and sorted on
+INTERNAL_COLUMNS = ("seq",)
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=")
+
+
+def _check_column(column):
+    if column not in COLUMNS + INTERNAL_COLUMNS:
+        raise ValueError(f"Unknown user_data column: {column!r}")
+
+
+class Query:
+    """Describes which part of user_data a generator should fetch
+
+    columns limits the projection, where is a list of
+    (column, operator, value) comparisons that must all hold, order_by
+    names a column to sort on and limit caps the number of rows. The
+    generators compile it into their SELECT so filtering happens in the
+    database.
+    """
+
+    def __init__(self, columns=None, where=None, limit=None, order_by=None):
+        self.columns = tuple(columns) if columns else COLUMNS
+        self.where = list(where or [])
+        self.limit = limit
+        self.order_by = order_by
+        if order_by is not None:
+            _check_column(order_by)
+        for column in self.columns:
+            _check_column(column)
+        for column, operator, _ in self.where:
+            _check_column(column)
+            if operator not in OPERATORS:
+                raise ValueError(f"Unsupported operator: {operator!r}")
+        if limit is not None and (not isinstance(limit, int) or limit < 0):
+            raise ValueError(f"Invalid limit: {limit!r}")
+
+    def to_sql(self, table="user_data"):
+        """Returns the (sql, params) pair selecting this query's rows"""
+        sql = f"SELECT {', '.join(self.columns)} FROM {table}"
+        params = tuple(value for _, _, value in self.where)
+        if self.where:
+            sql += " WHERE " + " AND ".join(
+                f"{column} {operator} %s"
+                for column, operator, _ in self.where)
+        if self.order_by is not None:
+            sql += f" ORDER BY {self.order_by}"
+        if self.limit is not None:
+            sql += " LIMIT %s"
+            params += (self.limit,)
+        return sql, params
+
+
+ALL_USERS = Query()
+
+
+def narrowed(query, where=(), order_by=None):
+    """Returns a copy of query with extra predicates and an ordering"""
+    return Query(query.columns, query.where + list(where), query.limit,
+                 order_by or query.order_by)
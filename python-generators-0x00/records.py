@@ -0,0 +1,20 @@
+#!/usr/bin/python3
+"""Compact tuple-backed rows for the streaming generators"""
+from collections import namedtuple
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def record_type(columns):
+    """Returns the shared namedtuple class for a tuple of column names
+
+    All rows with the same columns share this one class, so a row costs
+    no more than a plain tuple of its values while keeping attribute
+    access (row.age) and row._asdict() when a dict is needed.
+    """
+    return namedtuple('User', columns)
+
+
+def as_records(rows, columns):
+    """Lazily wraps plain cursor tuples as record_type(columns) rows"""
+    return map(record_type(tuple(columns))._make, rows)
@@ -2,11 +2,26 @@
 import mysql.connector
 import csv
 import os
+import queue
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from csv_parallel import read_csv_parallel, rechunk
+from keyindex import load_keys
+from pool import ConnectionPool, PoolTimeout
+from stats import create_stats_table, record_ages, round_age
+
 # Load environment variables from .env file
 load_dotenv()
 
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
 def connect_db():
     """Connects to MySQL database server"""
     try:
@@ -29,22 +44,173 @@ def create_database(connection):
     except mysql.connector.Error as err:
         print(f"Error: {err}")
 
+def _open_prodev():
+    """Opens a new connection to the ALX_prodev database"""
+    return mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'postgres'),
+        password=os.getenv('DB_PASSWORD', 'postgres'),
+        database=os.getenv('DB_NAME', 'ALX_prodev')
+    )
+
 def connect_to_prodev():
     """Connects to the ALX_prodev database"""
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'postgres'),
-            password=os.getenv('DB_PASSWORD', 'postgres'),
-            database=os.getenv('DB_NAME', 'ALX_prodev')
-        )
-        return connection
+        return _open_prodev()
     except mysql.connector.Error as err:
         print(f"Error: {err}")
         return None
 
+def _reset_connection(connection):
+    """Prepares a returned connection for its next borrower
+
+    A connection whose unbuffered cursor was abandoned with rows still
+    unread cannot be reused and is dropped instead.
+    """
+    if connection.unread_result:
+        return False
+    if connection.in_transaction:
+        connection.rollback()
+    return True
+
+def _close_connection(connection):
+    """Closes a connection, dropping the socket if rows are unread
+
+    close() would have to drain the rest of the pending result set
+    first, which can be most of the table for an abandoned scan.
+    """
+    if connection.unread_result:
+        connection.shutdown()
+    else:
+        connection.close()
+
+def _new_pool(factory, **options):
+    return ConnectionPool(
+        factory,
+        check=lambda connection: connection.is_connected(),
+        reset=_reset_connection,
+        close=_close_connection,
+        **options
+    )
+
+def get_pool():
+    """Returns the ALX_prodev connection pool shared by all generators"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # A forked child must not reuse its parent's sockets
+            _pool_pid = os.getpid()
+            _pool = _new_pool(
+                _open_prodev,
+                max_size=int(os.getenv('DB_POOL_SIZE', '5')),
+                idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))
+            )
+        return _pool
+
+def configure_pool(factory, **options):
+    """Replaces the shared pool with one opening connections via factory
+
+    Points every generator at another database, such as the SQLite
+    stand-in used by benchmark.py. options go to ConnectionPool.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+        _pool_pid = os.getpid()
+        _pool = _new_pool(factory, **options)
+        return _pool
+
+@contextmanager
+def pooled_connection():
+    """Borrows an ALX_prodev connection from the pool for a with block
+
+    Waits at most DB_POOL_TIMEOUT seconds (default 5) for a pooled
+    connection, then opens an extra one outside the pool, so a thread
+    holding several live generators never blocks on itself. Yields
+    None when no connection could be opened, like connect_to_prodev()
+    returns None.
+    """
+    pool = get_pool()
+    overflow = False
+    try:
+        try:
+            connection = pool.acquire(
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')))
+        except PoolTimeout:
+            connection = pool.open_overflow()
+            overflow = True
+    except mysql.connector.Error as err:
+        print(f"Error: {err}")
+        yield None
+        return
+    try:
+        yield connection
+    finally:
+        if overflow:
+            pool.close_overflow(connection)
+        else:
+            pool.release(connection)
+
+def close_cursor(connection, cursor):
+    """Closes a cursor unless it was abandoned with rows still unread
+
+    Closing would drain the rest of the result set; the pool drops
+    such a connection on release instead.
+    """
+    if not connection.unread_result:
+        cursor.close()
+
+def _user_data_schema(cursor):
+    """Returns the {column: type} and index names of user_data"""
+    cursor.execute("""
+        SELECT COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user_data'
+    """)
+    # Older servers report display widths, e.g. tinyint(3) unsigned
+    columns = {name: re.sub(r'\(\d+\)', '', column_type.lower())
+               for name, column_type in cursor}
+    cursor.execute("""
+        SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user_data'
+    """)
+    indexes = {name for (name,) in cursor}
+    return columns, indexes
+
+def migrate_user_data(connection):
+    """Brings an existing user_data table up to the current schema
+
+    Narrows age to TINYINT UNSIGNED, adds the seq ingest column (see
+    tail.py), indexes the age and email filter columns and drops the
+    index that duplicated the primary key. All changes go into one
+    ALTER TABLE so the table is rebuilt at most once. Returns the list
+    of changes applied.
+    """
+    cursor = connection.cursor()
+    columns, indexes = _user_data_schema(cursor)
+    changes = []
+    if columns.get('age') != 'tinyint unsigned':
+        changes.append("MODIFY age TINYINT UNSIGNED NOT NULL")
+    if 'seq' not in columns:
+        changes.append("ADD COLUMN seq BIGINT UNSIGNED NOT NULL AUTO_INCREMENT")
+    if 'idx_seq' not in indexes:
+        changes.append("ADD UNIQUE INDEX idx_seq (seq)")
+    if 'idx_age' not in indexes:
+        changes.append("ADD INDEX idx_age (age)")
+    if 'idx_email' not in indexes:
+        changes.append("ADD INDEX idx_email (email)")
+    if 'idx_user_id' in indexes:
+        changes.append("DROP INDEX idx_user_id")
+    if changes:
+        cursor.execute(f"ALTER TABLE user_data {', '.join(changes)}")
+    cursor.close()
+    return changes
+
 def create_table(connection):
-    """Creates user_data table if it doesn't exist"""
+    """Creates user_data table if it doesn't exist
+
+    An existing table is migrated to the current schema in place.
+    """
     try:
         cursor = connection.cursor()
         cursor.execute("""
@@ -52,27 +218,223 @@ def create_table(connection):
                 user_id VARCHAR(36) PRIMARY KEY,
                 name VARCHAR(255) NOT NULL,
                 email VARCHAR(255) NOT NULL,
-                age DECIMAL NOT NULL,
-                INDEX idx_user_id (user_id)
+                age TINYINT UNSIGNED NOT NULL,
+                seq BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+                UNIQUE INDEX idx_seq (seq),
+                INDEX idx_age (age),
+                INDEX idx_email (email)
             )
         """)
-        print("Table user_data created successfully")
         cursor.close()
+        migrate_user_data(connection)
+        print("Table user_data created successfully")
+        create_stats_table(connection)
     except mysql.connector.Error as err:
         print(f"Error: {err}")
 
-def insert_data(connection, csv_file):
-    """Inserts data from CSV file into the database"""
+INSERT_SQL = """
+    INSERT IGNORE INTO user_data (user_id, name, email, age)
+    VALUES (%s, %s, %s, %s)
+"""
+
+def count_csv_rows(csv_file):
+    """Returns the number of data lines in csv_file without parsing it
+
+    Quoted fields spanning lines make this an overestimate, which is
+    fine for sizing (see keyindex.load_keys).
+    """
+    lines = 0
+    last = b'\n'
+    with open(csv_file, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1
+    return max(lines - 1, 0)
+
+def read_csv_chunks(csv_file, chunk_size):
+    """Yields lists of up to chunk_size (user_id, name, email, age) tuples"""
+    with open(csv_file, 'r') as file:
+        chunk = []
+        for row in csv.DictReader(file):
+            chunk.append((row['user_id'], row['name'], row['email'], row['age']))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def _new_rows(cursor, chunk, keys=None):
+    """Returns the rows of chunk whose user_id is not yet in user_data
+
+    Matches INSERT IGNORE: only the first row for a repeated user_id
+    counts. With a key index from keyindex.load_keys, known user_ids
+    are dropped without a round trip and only those it cannot rule out
+    are looked up; the user_ids returned are added to it.
+    """
+    rows = {}
+    for row in chunk:
+        rows.setdefault(row[0], row)
+    unknown, fresh = rows, []
+    if keys is not None:
+        unknown = {}
+        with keys.lock:
+            for user_id, row in rows.items():
+                if not keys.might_contain(user_id):
+                    fresh.append(row)
+                elif not keys.exact:
+                    unknown[user_id] = row
+    if unknown:
+        placeholders = ', '.join(['%s'] * len(unknown))
+        cursor.execute(
+            f"SELECT user_id FROM user_data WHERE user_id IN ({placeholders})",
+            tuple(unknown))
+        for (user_id,) in cursor.fetchall():
+            unknown.pop(user_id, None)
+        fresh.extend(unknown.values())
+    if keys is not None:
+        with keys.lock:
+            for row in fresh:
+                keys.add(row[0])
+    return fresh
+
+def _written_rows(cursor, new_rows):
+    """Returns the rows of new_rows that the last INSERT IGNORE wrote
+
+    A concurrent loader may have committed some of the same user_ids
+    after _new_rows looked, in which case INSERT IGNORE skipped them.
+    When its row count says so, the rows are looked up again in this
+    transaction: under InnoDB's default REPEATABLE READ its snapshot
+    still hides the other loader's rows and shows only its own.
+    """
+    if cursor.rowcount == len(new_rows):
+        return new_rows
+    placeholders = ', '.join(['%s'] * len(new_rows))
+    cursor.execute(
+        f"SELECT user_id FROM user_data WHERE user_id IN ({placeholders})",
+        tuple(row[0] for row in new_rows))
+    written = {user_id for (user_id,) in cursor.fetchall()}
+    return [row for row in new_rows if row[0] in written]
+
+def _insert_chunks(connection, chunks, commit_every, keys=None):
+    """Inserts each chunk with one multi-row statement
+
+    Commits whenever commit_every rows have accumulated and once more
+    at the end, folding the ages of the rows actually inserted into the
+    age histogram in the same transaction. Returns the number of rows
+    sent.
+    """
+    cursor = connection.cursor()
+    sent = pending = 0
+    ages = Counter()
+    for chunk in chunks:
+        new_rows = _new_rows(cursor, chunk, keys)
+        if new_rows:
+            cursor.executemany(INSERT_SQL, new_rows)
+            new_rows = _written_rows(cursor, new_rows)
+            ages.update(round_age(row[3]) for row in new_rows)
+        sent += len(chunk)
+        pending += len(chunk)
+        if pending >= commit_every:
+            record_ages(cursor, ages)
+            connection.commit()
+            pending = 0
+            ages.clear()
+    record_ages(cursor, ages)
+    connection.commit()
+    cursor.close()
+    return sent
+
+def _put_chunk(pending, chunk, futures):
+    """Queues chunk, raising a dead worker's error instead of blocking"""
+    while True:
+        try:
+            pending.put(chunk, timeout=1)
+            return
+        except queue.Full:
+            for future in futures:
+                if future.done():
+                    future.result()
+
+def _insert_parallel(chunks, commit_every, workers, chunk_size, keys=None):
+    """Fans rows out to worker threads with their own pooled connections
+
+    Rows are routed by user_id, so every copy of a user_id reaches the
+    same worker. Its transaction then sees its own earlier insert, and
+    two workers never race to insert (and count) the same row or wait
+    on each other's uncommitted duplicates.
+    """
+    pending = [queue.Queue(maxsize=2) for _ in range(workers)]
+    buckets = [[] for _ in range(workers)]
+
+    def worker(rows):
+        # Falls back to an overflow connection rather than waiting on
+        # a pool smaller than workers
+        with pooled_connection() as connection:
+            if not connection:
+                raise RuntimeError("Could not connect to ALX_prodev")
+            return _insert_chunks(connection, iter(rows.get, None),
+                                  commit_every, keys)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(worker, rows) for rows in pending]
+        try:
+            for chunk in chunks:
+                for row in chunk:
+                    index = hash(row[0]) % workers
+                    buckets[index].append(row)
+                    if len(buckets[index]) == chunk_size:
+                        _put_chunk(pending[index], buckets[index], futures)
+                        buckets[index] = []
+            for rows, bucket in zip(pending, buckets):
+                if bucket:
+                    _put_chunk(rows, bucket, futures)
+        except BaseException:
+            # Drop queued work so every worker can see its sentinel
+            for rows in pending:
+                try:
+                    while True:
+                        rows.get_nowait()
+                except queue.Empty:
+                    pass
+            raise
+        finally:
+            for rows in pending:
+                _put_chunk(rows, None, futures)
+        return sum(future.result() for future in futures)
+
+def insert_data(connection, csv_file, chunk_size=1000, commit_every=10000,
+                workers=1, parse_workers=0, dedup=False):
+    """Inserts data from CSV file into the database
+
+    Rows are read chunk_size at a time and sent as multi-row inserts,
+    committing every commit_every rows. With workers > 1 the chunks
+    are spread over that many pooled connections, each user_id always
+    going to the same one; workers the pool cannot serve within
+    DB_POOL_TIMEOUT open overflow connections. With parse_workers set
+    the file is memory-mapped and parsed by that many processes
+    (see csv_parallel.py). dedup first loads the existing user_ids
+    into memory (see keyindex.py) so re-delivered rows are dropped
+    client-side. Returns the number of rows read from the file.
+
+    Each open transaction holds up to commit_every seq values, so
+    parallel workers commit rows out of seq order; see tail.py's
+    lookback for tailing a table while it loads.
+    """
     try:
-        cursor = connection.cursor()
-        with open(csv_file, 'r') as file:
-            csv_reader = csv.DictReader(file)
-            for row in csv_reader:
-                cursor.execute("""
-                    INSERT IGNORE INTO user_data (user_id, name, email, age)
-                    VALUES (%s, %s, %s, %s)
-                """, (row['user_id'], row['name'], row['email'], row['age']))
-        connection.commit()
-        cursor.close()
+        keys = None
+        if dedup:
+            keys = load_keys(connection,
+                             expected_new=count_csv_rows(csv_file))
+        if parse_workers:
+            chunks = rechunk(read_csv_parallel(csv_file, parse_workers),
+                             chunk_size)
+        else:
+            chunks = read_csv_chunks(csv_file, chunk_size)
+        if workers > 1:
+            return _insert_parallel(chunks, commit_every, workers,
+                                    chunk_size, keys)
+        return _insert_chunks(connection, chunks, commit_every, keys)
     except mysql.connector.Error as err:
-        print(f"Error: {err}")
\ No newline at end of file
+        print(f"Error: {err}")
@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+"""Single-pass, bounded-memory statistics over a stream of numbers
+
+StreamingStats folds values in one at a time with update() or a whole
+NumPy batch at a time with update_batch(), and at any point can report
+count, mean, variance (Welford / Chan moments), min, max, a histogram,
+approximate quantiles from a compacting sketch and a uniform reservoir
+sample.
+"""
+import math
+import random
+from collections import Counter
+
+import numpy as np
+
+
+class QuantileSketch:
+    """KLL-style compacting quantile sketch
+
+    Level i holds items standing for 2**i values each. When a level
+    reaches capacity it is sorted and every other item (from a random
+    offset) moves up a level, so memory stays O(capacity * log n)
+    and rank error is about 1 / capacity.
+    """
+
+    def __init__(self, capacity=200, rng=None):
+        self.capacity = capacity
+        self.levels = [[]]
+        self.rng = rng or random.Random()
+
+    def update(self, value):
+        self.levels[0].append(value)
+        if len(self.levels[0]) >= self.capacity:
+            self._compact()
+
+    def update_batch(self, values):
+        for start in range(0, len(values), self.capacity):
+            self.levels[0].extend(values[start:start + self.capacity].tolist())
+            if len(self.levels[0]) >= self.capacity:
+                self._compact()
+
+    def quantile(self, q):
+        """Approximate value at rank q (0 <= q <= 1)"""
+        weighted = sorted((value, 1 << level)
+                          for level, items in enumerate(self.levels)
+                          for value in items)
+        if not weighted:
+            return None
+        target = q * sum(weight for _, weight in weighted)
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return value
+        return weighted[-1][0]
+
+    def _compact(self):
+        level = 0
+        while len(self.levels[level]) >= self.capacity:
+            items = sorted(self.levels[level])
+            self.levels[level] = []
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            self.levels[level + 1].extend(items[self.rng.randrange(2)::2])
+            level += 1
+
+
+class StreamingStats:
+    """One-pass accumulator for mean, variance, extremes and sketches"""
+
+    def __init__(self, reservoir_size=1000, sketch_capacity=200,
+                 bin_width=1, seed=None):
+        self.rng = random.Random(seed)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.bin_width = bin_width
+        self.histogram = Counter()
+        self.sketch = QuantileSketch(sketch_capacity, self.rng)
+        self.reservoir_size = reservoir_size
+        self.reservoir = []
+
+    def update(self, value):
+        """Folds one value in"""
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.histogram[math.floor(value / self.bin_width) * self.bin_width] += 1
+        self.sketch.update(value)
+        if len(self.reservoir) < self.reservoir_size:
+            self.reservoir.append(value)
+        else:
+            slot = self.rng.randrange(self.count)
+            if slot < self.reservoir_size:
+                self.reservoir[slot] = value
+
+    def update_batch(self, values):
+        """Folds a whole array of values in with vectorized updates"""
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        if not n:
+            return
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        bins, counts = np.unique(
+            np.floor(values / self.bin_width) * self.bin_width,
+            return_counts=True)
+        self.histogram.update(dict(zip(bins.tolist(), counts.tolist())))
+        self.sketch.update_batch(values)
+        self._sample_batch(values)
+        self.count = total
+
+    def _sample_batch(self, values):
+        """Reservoir sampling (Algorithm R) over a batch at once"""
+        fill = min(self.reservoir_size - len(self.reservoir), len(values))
+        if fill > 0:
+            self.reservoir.extend(values[:fill].tolist())
+        rest = values[fill:]
+        if not len(rest):
+            return
+        # Item number t (1-based over the whole stream) lands in a
+        # random slot below t; only slots inside the reservoir count.
+        seen = self.count + fill + np.arange(1, len(rest) + 1)
+        rng = np.random.default_rng(self.rng.getrandbits(64))
+        slots = (rng.random(len(rest)) * seen).astype(np.int64)
+        for index in np.flatnonzero(slots < self.reservoir_size):
+            self.reservoir[slots[index]] = float(rest[index])
+
+    def variance(self):
+        """Population variance"""
+        return self.m2 / self.count if self.count else None
+
+    def stddev(self):
+        return math.sqrt(self.variance()) if self.count else None
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.mean if self.count else None,
+            "variance": self.variance(),
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+"""SQLite stand-in for the parts of mysql.connector the generators use
+
+Lets the benchmark harness run the real generator code against a local
+SQLite file: %s placeholders become ?, INSERT IGNORE becomes INSERT OR
+IGNORE and cursors can return dicts like cursor(dictionary=True).
+"""
+import sqlite3
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS user_data (
+        user_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        age INTEGER NOT NULL,
+        seq INTEGER
+    )
+"""
+
+
+def _translate(sql):
+    return sql.replace('%s', '?').replace('INSERT IGNORE', 'INSERT OR IGNORE')
+
+
+class Cursor:
+    """mysql.connector-style cursor over a sqlite3 cursor"""
+
+    def __init__(self, connection, dictionary=False):
+        self._cursor = connection.cursor()
+        self.dictionary = dictionary
+        self.column_names = ()
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(_translate(sql), tuple(params))
+        description = self._cursor.description or ()
+        self.column_names = tuple(column[0] for column in description)
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(_translate(sql), rows)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def _wrap(self, rows):
+        if not self.dictionary:
+            return rows
+        return [dict(zip(self.column_names, row)) for row in rows]
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else self._wrap([row])[0]
+
+    def fetchmany(self, size=1):
+        return self._wrap(self._cursor.fetchmany(size))
+
+    def fetchall(self):
+        return self._wrap(self._cursor.fetchall())
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany(1000)
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    """mysql.connector-style connection to a SQLite database file"""
+
+    unread_result = False
+
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+    def cursor(self, dictionary=False, buffered=None):
+        return Cursor(self._connection, dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    def is_connected(self):
+        return True
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+    shutdown = close
+
+
+def create_database(path, rows):
+    """Creates a SQLite user_data table at path holding rows tuples"""
+    connection = sqlite3.connect(path)
+    connection.execute("DROP TABLE IF EXISTS user_data")
+    connection.execute(SCHEMA)
+    connection.executemany(
+        "INSERT INTO user_data (user_id, name, email, age, seq) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (row + (seq,) for seq, row in enumerate(rows, 1)))
+    connection.commit()
+    connection.close()
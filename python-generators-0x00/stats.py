@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+"""Incrementally maintained age statistics for user_data
+
+The user_age_histogram table holds the number of users per age. Ages
+span a small fixed range, so count, sum, sum of squares, min, max and
+percentiles all follow from a few hundred rows at most, however large
+user_data grows. seed.insert_data keeps it up to date as it loads.
+"""
+from collections import Counter
+from decimal import ROUND_HALF_UP, Decimal
+
+
+def round_age(age):
+    """Rounds a CSV age the way MySQL stores it: halves away from zero
+
+    Python's round() sends halves to the even integer, so counting
+    with it would disagree with user_data on ages like "30.5".
+    """
+    return int(Decimal(str(age)).to_integral_value(ROUND_HALF_UP))
+
+
+def create_stats_table(connection):
+    """Creates the user_age_histogram table if it doesn't exist"""
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_age_histogram (
+            age SMALLINT PRIMARY KEY,
+            users BIGINT NOT NULL
+        )
+    """)
+    cursor.close()
+
+
+def record_ages(cursor, ages):
+    """Adds a Counter of age -> new users to the histogram
+
+    Runs inside the caller's transaction, so the histogram commits or
+    rolls back together with the rows it describes.
+    """
+    if ages:
+        cursor.executemany("""
+            INSERT INTO user_age_histogram (age, users) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE users = users + VALUES(users)
+        """, [(int(age), users) for age, users in ages.items()])
+
+
+def rebuild_stats(connection):
+    """Recomputes the histogram from a full scan of user_data"""
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM user_age_histogram")
+    cursor.execute("""
+        INSERT INTO user_age_histogram (age, users)
+        SELECT age, COUNT(*) FROM user_data GROUP BY age
+    """)
+    connection.commit()
+    cursor.close()
+
+
+def load_stats(connection):
+    """Returns the maintained AgeStats for user_data"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT age, users FROM user_age_histogram WHERE users > 0")
+    histogram = Counter({int(age): int(users) for age, users in cursor})
+    cursor.close()
+    return AgeStats(histogram)
+
+
+class AgeStats:
+    """Summary statistics derived from an age histogram"""
+
+    def __init__(self, histogram=None):
+        self.histogram = Counter(histogram or {})
+        self.count = sum(self.histogram.values())
+        self.total = sum(age * users for age, users in self.histogram.items())
+        self.total_sq = sum(age * age * users
+                            for age, users in self.histogram.items())
+        self.min = min(self.histogram) if self.histogram else None
+        self.max = max(self.histogram) if self.histogram else None
+
+    @classmethod
+    def from_ages(cls, ages):
+        """Builds stats by scanning an iterable of ages"""
+        return cls(Counter(int(age) for age in ages))
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def variance(self):
+        """Population variance of the ages"""
+        if not self.count:
+            return None
+        mean = self.mean()
+        return max(self.total_sq / self.count - mean * mean, 0.0)
+
+    def percentile(self, p):
+        """Smallest age with at least p percent of users at or below it"""
+        if not self.count:
+            return None
+        if not 0 <= p <= 100:
+            raise ValueError(f"Percentile out of range: {p!r}")
+        threshold = max(p / 100 * self.count, 1)
+        seen = 0
+        for age in sorted(self.histogram):
+            seen += self.histogram[age]
+            if seen >= threshold:
+                return age
+        return self.max
+
+    def __eq__(self, other):
+        return isinstance(other, AgeStats) and self.histogram == other.histogram
+
+    def __repr__(self):
+        return (f"AgeStats(count={self.count}, mean={self.mean()}, "
+                f"min={self.min}, max={self.max})")
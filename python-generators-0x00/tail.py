@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""Incremental user_data streaming from a persisted high-water mark
+
+Each row carries the seq value assigned when it was inserted (see
+seed.create_table). A tail scan yields only rows with seq above the
+saved watermark, through the seq index, and moves the watermark on as
+rows are processed. With poll_interval set it then sleeps and looks
+again, following the table as new rows arrive.
+
+seq values are handed out at insert time, so while loaders run a row
+can commit after a higher seq has already been read. Each pass
+therefore re-reads the last lookback seqs below the watermark and
+skips the rows it has already yielded; a row committed more than
+lookback seqs late is still missed.
+"""
+import time
+
+from checkpoint import Checkpoint
+from query import ALL_USERS, Query
+
+stream_users = __import__('0-stream_users').stream_users
+
+
+def tail_users(path, poll_interval=None, every=1000, chunk_size=1000,
+               query=ALL_USERS, lookback=10000):
+    """Generator yielding user_data rows inserted since the last run
+
+    The watermark is kept in the file at path. A row counts as
+    processed once the consumer asks for the next one; the watermark
+    is saved every `every` rows and at the end of each pass. Rows
+    include their seq value. lookback should cover the rows loaders
+    hold uncommitted (workers * commit_every for seed.insert_data).
+    Rows already yielded are only remembered in memory, so after a
+    restart those in the lookback window are yielded again.
+    """
+    watermark = Checkpoint(path)
+    last = int(watermark.load() or 0)
+    seen = set()  # seqs yielded within lookback of last
+    columns = query.columns
+    if 'seq' not in columns:
+        columns += ('seq',)
+    while True:
+        pending = yielded = 0
+        # Rows skipped as seen must not use up the limit
+        limit = None if query.limit is None else query.limit + len(seen)
+        since = Query(columns,
+                      query.where + [('seq', '>', max(0, last - lookback))],
+                      limit, 'seq')
+        for row in stream_users(chunk_size, since):
+            seq = row['seq']
+            if seq in seen:
+                continue
+            if query.limit is not None and yielded >= query.limit:
+                break
+            yield row
+            seen.add(seq)
+            last, pending, yielded = max(last, seq), pending + 1, yielded + 1
+            if pending >= every:
+                watermark.save(str(last))
+                pending = 0
+                seen = {seq for seq in seen if seq > last - lookback}
+        if pending:
+            watermark.save(str(last))
+        seen = {seq for seq in seen if seq > last - lookback}
+        if poll_interval is None:
+            return
+        time.sleep(poll_interval)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Tests for pool.ConnectionPool with stand-in connections (no MySQL)"""
+
+import threading
+import time
+import unittest
+
+from pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    """Connection stand-in that only remembers whether it was closed"""
+
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeFactory:
+    """Opens numbered FakeConnections, failing while fail is set"""
+
+    def __init__(self):
+        self.opened = []
+        self.fail = False
+
+    def __call__(self):
+        if self.fail:
+            raise ConnectionError("server unreachable")
+        connection = FakeConnection(len(self.opened))
+        self.opened.append(connection)
+        return connection
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test cases for borrowing, sizing and discarding connections"""
+
+    def setUp(self):
+        self.factory = FakeFactory()
+
+    def make_pool(self, **options):
+        pool = ConnectionPool(self.factory, **options)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_max_size_blocks_until_release(self):
+        """A borrow past max_size waits for a release and reuses it"""
+        pool = self.make_pool(max_size=1)
+        first = pool.acquire()
+        threading.Timer(0.05, pool.release, (first,)).start()
+        second = pool.acquire(timeout=2)
+        self.assertIs(second, first)
+        self.assertEqual(len(self.factory.opened), 1)
+        self.assertGreater(pool.stats()["wait_max"], 0.01)
+        pool.release(second)
+
+    def test_max_size_timeout(self):
+        """A borrow past max_size raises PoolTimeout after timeout"""
+        pool = self.make_pool(max_size=1)
+        held = pool.acquire()
+        start = time.monotonic()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(timeout=0.05)
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+        pool.release(held)
+
+    def test_failed_factory_frees_slot(self):
+        """A connection that could not be opened does not use up a slot"""
+        pool = self.make_pool(max_size=1)
+        self.factory.fail = True
+        with self.assertRaises(ConnectionError):
+            pool.acquire(timeout=0.05)
+        self.assertEqual(pool.stats()["size"], 0)
+        self.factory.fail = False
+        connection = pool.acquire(timeout=0.05)
+        self.assertEqual(pool.stats()["size"], 1)
+        pool.release(connection)
+
+    def test_idle_timeout_evicts(self):
+        """Connections idle longer than idle_timeout are closed, not reused"""
+        pool = self.make_pool(max_size=2, idle_timeout=0.05)
+        old = [pool.acquire(), pool.acquire()]
+        for connection in old:
+            pool.release(connection)
+        time.sleep(0.1)
+        fresh = pool.acquire()
+        self.assertNotIn(fresh, old)
+        self.assertTrue(all(connection.closed for connection in old))
+        self.assertEqual(pool.stats()["size"], 1)
+        pool.release(fresh)
+
+    def test_failed_reset_discards(self):
+        """A connection whose reset returns False is closed on release"""
+        pool = self.make_pool(max_size=1, reset=lambda connection: False)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()["idle"], 0)
+        self.assertEqual(pool.stats()["size"], 0)
+        self.assertIsNot(pool.acquire(timeout=0.05), first)
+
+    def test_overflow_not_counted(self):
+        """Overflow connections neither count in size nor return to idle"""
+        pool = self.make_pool(max_size=1)
+        held = pool.acquire()
+        extra = pool.open_overflow()
+        stats = pool.stats()
+        self.assertEqual(stats["size"], 1)
+        self.assertEqual(stats["overflow"], 1)
+        pool.close_overflow(extra)
+        self.assertTrue(extra.closed)
+        self.assertEqual(pool.stats()["idle"], 0)
+        pool.release(held)
+        self.assertEqual(pool.stats()["size"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Tests for seed.insert_data against the ALX_prodev database
+
+Needs a reachable MySQL server (the DB_* settings) and replaces the
+contents of user_data; skipped otherwise.
+"""
+
+import csv
+import os
+import tempfile
+import unittest
+
+import seed
+from bench_utils import synthetic_rows
+from stats import AgeStats, load_stats
+
+
+class TestInsertData(unittest.TestCase):
+    """Test cases for the age histogram kept by insert_data"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.connection = seed.connect_to_prodev()
+        if cls.connection is None:
+            raise unittest.SkipTest("ALX_prodev database not reachable")
+        seed.create_table(cls.connection)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.connection.close()
+
+    def setUp(self):
+        cursor = self.connection.cursor()
+        cursor.execute("TRUNCATE TABLE user_data")
+        cursor.execute("TRUNCATE TABLE user_age_histogram")
+        cursor.close()
+        fd, self.csv_file = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        self.addCleanup(os.remove, self.csv_file)
+
+    def write_csv(self, rows):
+        with open(self.csv_file, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['user_id', 'name', 'email', 'age'])
+            writer.writerows(rows)
+
+    def scanned_stats(self):
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT age FROM user_data")
+        stats = AgeStats.from_ages(age for (age,) in cursor)
+        cursor.close()
+        self.connection.commit()
+        return stats
+
+    def test_cross_chunk_duplicates_with_workers(self):
+        """Rows repeated in other chunks are counted once with workers=2"""
+        rows = list(synthetic_rows(500))
+        # Every row appears again 250 rows (25 chunks) later
+        self.write_csv(rows + rows[:250] + rows[250:] + rows[:250])
+        sent = seed.insert_data(self.connection, self.csv_file,
+                                chunk_size=10, commit_every=100, workers=2)
+        self.assertEqual(sent, 1250)
+        stats = load_stats(self.connection)
+        self.assertEqual(stats.count, 500)
+        self.assertEqual(stats, self.scanned_stats())
+
+    def test_reload_with_dedup(self):
+        """Loading the same file twice leaves the histogram unchanged"""
+        self.write_csv(synthetic_rows(300))
+        for dedup in (False, True):
+            seed.insert_data(self.connection, self.csv_file, chunk_size=50,
+                             workers=2, dedup=dedup)
+        stats = load_stats(self.connection)
+        self.assertEqual(stats.count, 300)
+        self.assertEqual(stats, self.scanned_stats())
+
+
+if __name__ == "__main__":
+    unittest.main()